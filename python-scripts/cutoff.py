@@ -36,6 +36,8 @@ release_group = 'release_group_name'
 
 debug = False
 dry_run = True
+# Number of movies sent per tag edit request
+chunk_size = 500
 
 RED = '\033[31m'
 RESET = '\033[0m'
@@ -110,28 +112,34 @@ def add_tag(tag_name):
     response.raise_for_status()
 
 
-def tag_movie(movie_id, tag_id):
+def tag_movie(movie_ids, tag_id):
     """
-    Tag movie in Radarr
+    Tag movies in Radarr, in chunks of chunk_size
     Parameters:
-        movie_id (int): ID of movie
+        movie_ids (int or list): ID(s) of movies
         tag_id (int): ID of tag
     """
-    response = requests.put(radarr_url + f"/api/v3/movie/editor", headers={
-                            "X-Api-Key": radarr_api}, json={"movieIds": [movie_id], "tags": [tag_id], "applyTags": "add"})
-    response.raise_for_status()
+    if isinstance(movie_ids, int):
+        movie_ids = [movie_ids]
+    for i in range(0, len(movie_ids), chunk_size):
+        response = requests.put(radarr_url + f"/api/v3/movie/editor", headers={
+                                "X-Api-Key": radarr_api}, json={"movieIds": movie_ids[i:i + chunk_size], "tags": [tag_id], "applyTags": "add"})
+        response.raise_for_status()
 
 
-def untag_movie(movie_id, tag_id):
+def untag_movie(movie_ids, tag_id):
     """
-    Untag movie in Radarr
+    Untag movies in Radarr, in chunks of chunk_size
     Parameters:
-        movie_id (int): ID of movie
+        movie_ids (int or list): ID(s) of movies
         tag_id (int): ID of tag
     """
-    response = requests.put(radarr_url + f"/api/v3/movie/editor", headers={"X-Api-Key": radarr_api}, json={
-                            "movieIds": [movie_id], "tags": [tag_id], "applyTags": "remove"})
-    response.raise_for_status()
+    if isinstance(movie_ids, int):
+        movie_ids = [movie_ids]
+    for i in range(0, len(movie_ids), chunk_size):
+        response = requests.put(radarr_url + f"/api/v3/movie/editor", headers={"X-Api-Key": radarr_api}, json={
+                                "movieIds": movie_ids[i:i + chunk_size], "tags": [tag_id], "applyTags": "remove"})
+        response.raise_for_status()
 
 
 def main():
@@ -204,6 +212,9 @@ def main():
                                 )
                                 movies_printed += 1
                 dry_run_print = []
+                # Movies to (un)tag are collected and sent to the editor in batches of chunk_size
+                movies_to_tag = []
+                movies_to_untag = []
                 if tagging == 'Yes':
                     for movie in tqdm(movies, desc="Processing Movies to tag..."):
                         movie_id = movie['id']
@@ -220,20 +231,24 @@ def main():
                                     dry_run_print.append(
                                         f"Would tag movie: {movie['title']} with: {tag_name}")
                                 else:
-                                    tag_movie(movie_id, tag_id)
+                                    movies_to_tag.append(movie_id)
                                 tagged_movies += 1
                             elif movie_score > cutoff_score and tag_id in movie['tags']:
                                 if dry_run:
                                     dry_run_print.append(
                                         f"Would untag movie: {movie['title']} with: {tag_name}")
                                 else:
-                                    untag_movie(movie_id, tag_id)
+                                    movies_to_untag.append(movie_id)
                                 untagged_movies += 1
                             if movie_score <= cutoff_score:
                                 cutoff_unmet += 1
                             else:
                                 cutoff_met += 1
                         total_movies += 1
+                if movies_to_tag:
+                    tag_movie(movies_to_tag, tag_id)
+                if movies_to_untag:
+                    untag_movie(movies_to_untag, tag_id)
                 if dry_run:
                     for dry_run_line in dry_run_print:
                         print(dry_run_line)
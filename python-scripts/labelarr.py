@@ -16,43 +16,35 @@ script_version = "2.2.0"
 
 from plexapi.exceptions import BadRequest, NotFound
 from modules.discord import discord, field_builder
-from modules.arrpy import arrpy_py_version, StARR
+from modules.arrpy import arrpy_py_version, default_media_fields
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.fleet import Fleet
+from modules.deadline import load_deadline
+from modules.snapshot import load_snapshot
+from modules.cache import load_cache
 from modules.formatting import create_table
 from modules.logger import setup_logger
 from plexapi.server import PlexServer
 from modules.version import version
 from modules.config import Config
-from unidecode import unidecode
+from modules.normalize import load_normalize, normalize_titles
 from tqdm import tqdm
-import html
 import json
 import time
-import re
 
 script_name = "labelarr"
 config = Config(script_name)
 log_level = config.log_level
 logger = setup_logger(log_level, script_name)
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, script_name, logger)
+snapshot = load_snapshot(config, logger)
+cache = load_cache(config, logger)
+load_normalize(config, logger)
 version(script_name, script_version, arrpy_py_version, logger, config)
 
-words_to_remove = [
-    "(US)",
-]
-year_regex = re.compile(r"\((19|20)\d{2}\)")
-illegal_chars_regex = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
-remove_special_chars = re.compile(r'[^a-zA-Z0-9\s]+')
-
-def normalize_titles(title):
-    normalized_title = title
-    normalized_title = year_regex.sub('', normalized_title)
-    normalized_title = illegal_chars_regex.sub('', normalized_title)
-    normalized_title = unidecode(html.unescape(normalized_title))
-    normalized_title = normalized_title.rstrip()
-    normalized_title = normalized_title.replace('&', 'and')
-    normalized_title = re.sub(remove_special_chars, '', normalized_title).lower()
-    normalized_title = normalized_title.replace(' ', '')
-    return normalized_title
-
 def get_plex_data(plex, instance_type):
     library_names = [name.title() for name in config.library_names]
     logger.debug(f"Library Names: {library_names}")
@@ -80,6 +72,7 @@ def get_plex_data(plex, instance_type):
     return plex_data
 
 def sync_labels_to_plex(plex, media, instance_type, app, user_labels, dry_run, plex_data):
+    logger = app.logger
     logger.debug("Syncing labels to Plex")
     message = []
     items_to_sync = {}
@@ -88,24 +81,20 @@ def sync_labels_to_plex(plex, media, instance_type, app, user_labels, dry_run, p
     label_to_tag = {}
     while retries < 3:
         for label in user_labels:
-            tag_id = app.get_tag_id_from_name(label)
-            if not tag_id:
+            if not app.get_tag_id_from_name(label):
                 logger.info(f"Tag ID not found for '{label}'. Creating tag...")
-                tag_id = app.create_tag(label)
-                logger.debug(f"Tag: {label} | Tag ID: {tag_id}")
-                if tag_id:
-                    label_to_tag[label] = tag_id
-            else:
-                logger.debug(f"Tag: {label} | Tag ID: {tag_id}")
+        for label, tag_id in app.tag_registry.ensure_tags(user_labels).items():
+            logger.debug(f"Tag: {label} | Tag ID: {tag_id}")
+            if tag_id:
                 label_to_tag[label] = tag_id
         # match labels to tags
         if label_to_tag:
             retries = 3
             for item in media:
-                title = item['title']
+                title = item.title
                 normalized_title = normalize_titles(title)
-                year = item['year']
-                tags = item['tags']
+                year = item.year
+                tags = item.tags
                 for plex_item in plex_data:
                     plex_title = plex_data[plex_item]['title']
                     plex_year = plex_data[plex_item]['year']
@@ -159,55 +148,36 @@ def sync_labels_to_plex(plex, media, instance_type, app, user_labels, dry_run, p
     return message
 
 def sync_labels_from_plex(plex, media, instance_type, app, labels, dry_run, plex_data):
-    items_to_sync = {'add': [], 'remove': []}
+    logger = app.logger
     logger.info(f"Processing '{instance_type}' data")
     message = []
-    for label in labels:
-        tag_id = app.check_and_create_tag(label)
-        for plex_item in plex_data:
-            plex_title = plex_data[plex_item]['title']
-            plex_year = plex_data[plex_item]['year']
-            plex_labels = plex_data[plex_item]['labels']
-            normalized_plex_title = normalize_titles(plex_title)
-            for item in media:
-                title = item['title']
-                normalized_title = normalize_titles(title)
-                year = item['year']
-                media_id = item['id']
-                tags = item['tags']
-                if normalized_title == normalized_plex_title and year == plex_year:
-                    # Check if label is in Plex but not tagged in ARR
-                    if label in plex_labels and tag_id not in tags:
-                        # If tag_id is not in the add dict, add it
-                        if tag_id not in items_to_sync['add']:
-                            items_to_sync['add'][tag_id] = {'tag_id': tag_id, 'media_ids': []}
-                        # Add media_id to the add dict
-                        items_to_sync['add'][tag_id]['media_ids'].append(media_id)
-                        message.append(f"Label: {label} | Title: {title} | Year: {year} | Add/Remove: add")
-                    # Check if label is not in Plex but is tagged in ARR
-                    elif label not in plex_labels and tag_id in tags:
-                        # If tag_id is not in the remove dict, add it
-                        if tag_id not in items_to_sync['remove']:
-                            items_to_sync['remove'][tag_id] = {'tag_id': tag_id, 'media_ids': []}
-                        # Add media_id to the remove dict
-                        items_to_sync['remove'][tag_id]['media_ids'].append(media_id)
-                        message.append(f"Label: {label} | Title: {title} | Year: {year} | Add/Remove: remove")
-    if items_to_sync:
-        for item in items_to_sync:
-            if item == 'add':
-                for tag_id in items_to_sync[item]:
-                    tags = tag_id['tag_id']
-                    media_ids = tag_id['media_ids']
-                    if tags and media_ids:
-                        if not dry_run:
-                            app.add_tags(media_ids, tags)
-            elif item == 'remove':
-                for tag_id in items_to_sync[item]:
-                    tags = tag_id['tag_id']
-                    media_ids = tag_id['media_ids']
-                    if tags and media_ids:
-                        if not dry_run:
-                            app.remove_tags(media_ids, tags)
+    label_to_tag = app.tag_registry.ensure_tags(labels)
+    # Tag edits are queued and sent as one editor call per tag and operation when the block ends
+    with app.batch() as batch:
+        for label in labels:
+            tag_id = label_to_tag[label]
+            for plex_item in plex_data:
+                plex_title = plex_data[plex_item]['title']
+                plex_year = plex_data[plex_item]['year']
+                plex_labels = plex_data[plex_item]['labels']
+                normalized_plex_title = normalize_titles(plex_title)
+                for item in media:
+                    title = item.title
+                    normalized_title = normalize_titles(title)
+                    year = item.year
+                    media_id = item.id
+                    tags = item.tags
+                    if normalized_title == normalized_plex_title and year == plex_year:
+                        # Check if label is in Plex but not tagged in ARR
+                        if label in plex_labels and tag_id not in tags:
+                            if not dry_run:
+                                batch.add_tags(media_id, tag_id)
+                            message.append(f"Label: {label} | Title: {title} | Year: {year} | Add/Remove: add")
+                        # Check if label is not in Plex but is tagged in ARR
+                        elif label not in plex_labels and tag_id in tags:
+                            if not dry_run:
+                                batch.remove_tags(media_id, tag_id)
+                            message.append(f"Label: {label} | Title: {title} | Year: {year} | Add/Remove: remove")
     return message
 
 def handle_messages(final_output):
@@ -248,45 +218,35 @@ def main():
     except BadRequest:
         logger.error("Plex URL or API Key is incorrect")
         exit()
-    instance_data = {
-        'Radarr': config.radarr_data,
-        'Sonarr': config.sonarr_data
-    }
+    fleet = Fleet(config, logger, cache=cache, metrics=metrics, fixtures=fixtures, snapshot=snapshot, deadline=deadline)
+
+    def run_instance(app, instance):
+        instance_type = instance['instance_type']
+        data = [
+            ["Script Name", "Instance Name"],
+            [instance['settings']['name'], instance['name']]
+        ]
+        create_table(data, log_level="info", logger=app.logger)
+        app.logger.debug(f"url: {instance['url']}")
+        app.logger.debug(f"api: {'*' * (len(instance['api']) - 5)}{instance['api'][-5:]}")
+        media = app.get_media(fields=default_media_fields)
+        plex_data = get_plex_data(plex, instance_type)
+        if config.add_from_plex:
+            return sync_labels_from_plex(plex, media, instance_type, app, labels, dry_run, plex_data)
+        return sync_labels_to_plex(plex, media, instance_type, app, labels, dry_run, plex_data)
+
     final_output = []
-    for instance_type, instances in instance_data.items():
-        for instance in instances:
-            instance_name = instance['name']
-            url = instance['url']
-            api = instance['api']
-            script_name = None
-            if instance_type == "Radarr" and config.radarr:
-                data = next((data for data in config.radarr if data['name'] == instance_name), None)
-                if data:
-                    script_name = data['name']
-            elif instance_type == "Sonarr" and config.sonarr:
-                data = next((data for data in config.sonarr if data['name'] == instance_name), None)
-                if data:
-                    script_name = data['name']
-            if script_name and instance_name == script_name:
-                data = [
-                    ["Script Name", "Instance Name"],
-                    [script_name, instance_name]
-                ]
-                create_table(data, log_level="info", logger=logger)
-                logger.debug(f"url: {url}")
-                logger.debug(f"api: {'*' * (len(api) - 5)}{api[-5:]}")
-                app = StARR(url, api, logger)
-                media = app.get_media()
-                plex_data = get_plex_data(plex, instance_type)
-                if config.add_from_plex:
-                    final_output.extend(sync_labels_from_plex(plex, media, instance_type, app, labels, dry_run, plex_data))
-                else:
-                    final_output.extend(sync_labels_to_plex(plex, media, instance_type, app, labels, dry_run, plex_data))
+    for result in fleet.run(run_instance).values():
+        if result.ok:
+            final_output.extend(result.value)
     handle_messages(final_output)
+    if cache:
+        cache.log_stats()
 
 if __name__ == "__main__":
     start_time = time.time()
     main()
+    export_metrics(metrics, config, script_name, logger)
     end_time = time.time()
     total_time = round(end_time - start_time, 2)
     logger.info(f"Total Time: {time.strftime('%H:%M:%S', time.gmtime(total_time))}")
@@ -1,7 +1,21 @@
-import sys
+import asyncio
 import requests
 import logging
 import json
+import time
+import codecs
+import random
+import threading
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from modules.metrics import RequestMetrics, endpoint_template
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 arrpy_py_version = "1.2.7"
 
@@ -9,22 +23,492 @@ logging.getLogger("qbittorrentapi").setLevel(logging.WARNING)
 logging.getLogger("requests").setLevel(logging.WARNING)
 logging.getLogger('urllib3').setLevel(logging.WARNING)
 
+json_decoder = json.JSONDecoder()
+
+def decode_json(response):
+    """
+    Decode a JSON response, using orjson when it is installed.
+    Parameters:
+        response (requests.Response): The response to decode.
+    Returns:
+        The decoded JSON.
+    """
+    if orjson:
+        return orjson.loads(response.content)
+    return response.json()
+
+def iter_json_array(chunks):
+    """
+    Incrementally decode a top-level JSON array, yielding each element as soon as it is complete.
+    Only the element being decoded is held in memory rather than the whole body.
+    Parameters:
+        chunks (iterable): The raw bytes of the body, in chunks.
+    Yields:
+        Each element of the array.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    finished = False
+    chunks = iter(chunks)
+    while not finished:
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += decoder.decode(b"", final=True)
+            finished = True
+        else:
+            buffer += decoder.decode(chunk)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Response is not a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = json_decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if finished:
+                    raise
+                break
+            # A value is only complete once the delimiter after it has arrived, a number
+            # at the end of the buffer may continue in the next chunk
+            delimiter = end
+            while delimiter < len(buffer) and buffer[delimiter] in " \t\r\n":
+                delimiter += 1
+            if delimiter == len(buffer) or buffer[delimiter] not in ",]":
+                if finished:
+                    raise ValueError("Malformed JSON array")
+                break
+            yield item
+            position = end
+        buffer = buffer[position:]
+    if started:
+        raise ValueError("Unterminated JSON array")
+
+default_media_fields = ("id", "title", "year", "path", "tags", "monitored", "status", "qualityProfileId", "alternateTitles")
+
+class MediaRecord:
+    """
+    Compact, read-only view of a media object holding only a declared set of fields.
+    Fields are read like a dict (record['title']), missing fields raise KeyError the same way.
+    Reading them as attributes (record.title) is several times faster, use that in hot loops.
+    """
+    __slots__ = ()
+    fields = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        for field in cls.fields:
+            if field in data:
+                object.__setattr__(record, field, data[field])
+        return record
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.fields and hasattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [field for field in self.fields if hasattr(self, field)]
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.keys()}
+
+    def __repr__(self):
+        return f"MediaRecord({self.to_dict()})"
+
+media_record_types = {}
+
+def media_record_type(fields=default_media_fields):
+    """
+    Get the MediaRecord class for a set of fields, creating it the first time it is needed.
+    Parameters:
+        fields (list): The fields the records hold.
+    Returns:
+        type: A MediaRecord subclass with a slot for each field.
+    """
+    fields = tuple(fields)
+    record_type = media_record_types.get(fields)
+    if record_type is None:
+        record_type = type("MediaRecord", (MediaRecord,), {"__slots__": fields, "fields": fields})
+        media_record_types[fields] = record_type
+    return record_type
+
+class StARRError(Exception):
+    def __init__(self, message, method=None, endpoint=None, status=None, response=None):
+        """
+        Raised when a request to an ARR instance fails for good, either with a status that isn't
+        worth retrying or after the retry policy gave up.
+        Parameters:
+            message (str): What went wrong.
+            method (str): The HTTP method.
+            endpoint (str): The URL of the request.
+            status (int): The HTTP status code of the last response, None if there was no response.
+            response (requests.Response): The last response, None if there was no response.
+        """
+        super().__init__(message)
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+        self.response = response
+
+class DeadlineExceeded(StARRError):
+    """
+    Raised when the run's deadline has passed, or would pass before a retry could be made.
+    """
+
+class RetryPolicy:
+    def __init__(self, max_retries=5, backoff=1, max_backoff=60, retry_statuses=(429, 500, 502, 503, 504)):
+        """
+        Initialize the RetryPolicy class.
+        Timeouts, connection errors and the retry statuses are retried with exponential backoff and full jitter,
+        a Retry-After header from the server is honoured. Any other error status fails straight away.
+        Parameters:
+            max_retries (int): The number of retries after the first attempt.
+            backoff (float): The base delay in seconds, doubled with each retry.
+            max_backoff (float): The longest delay in seconds, including one asked for with Retry-After.
+            retry_statuses (tuple): The HTTP status codes that are retried.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+
+    def should_retry(self, response):
+        """
+        Check if an error response is worth retrying, timeouts and connection errors always are.
+        Parameters:
+            response (requests.Response): The error response.
+        Returns:
+            bool: True if the request should be retried.
+        """
+        return response.status_code in self.retry_statuses
+
+    def retry_after(self, response):
+        """
+        Read the Retry-After header of a response.
+        Returns:
+            float: The seconds to wait, or None if the header is missing or invalid.
+        """
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    def delay(self, attempt, response=None):
+        """
+        Work out how long to wait before a retry.
+        Parameters:
+            attempt (int): The number of the retry, starting at 1.
+            response (requests.Response): The error response, if any.
+        Returns:
+            float: The seconds to wait.
+        """
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Initialize the SingleFlight class.
+        Concurrent calls with the same key share one execution: the first caller runs the function,
+        callers that arrive while it is running wait for it and get the same result (or exception).
+        """
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.shared = 0
+
+    def do(self, key, func):
+        """
+        Run func, or wait for the call already running for the same key.
+        Parameters:
+            key (hashable): Identifies identical calls.
+            func (callable): The call to make.
+        Returns:
+            The return value of func, the same object is returned to every caller that shared the call.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self.calls[key] = call
+            else:
+                self.shared += 1
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = func()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call["done"].set()
+
+class MutationBatcher:
+    def __init__(self, app, threshold=5000):
+        """
+        Initialize the MutationBatcher class.
+        Collects add_tags/remove_tags calls and sends them as few editor requests as possible:
+        one per operation and set of media, with every tag that applies to the same media in one request.
+        A later edit of the same media and tag replaces an earlier opposite one.
+        Parameters:
+            app (StARR): The instance to send the edits to.
+            threshold (int): Flush once this many edits are waiting.
+        """
+        self.app = app
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        # (apply_tags, tag_id) -> media IDs, a dict keeps the order they were added in
+        self.pending = {}
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.flush()
+        except Exception as e:
+            if exc_type is None:
+                raise
+            self.app.logger.error(f"Unable to send pending tag edits: {e}")
+        return False
+
+    def queue(self, apply_tags, media_ids, tag_id):
+        if isinstance(media_ids, int):
+            media_ids = [media_ids]
+        opposite = "remove" if apply_tags == "add" else "add"
+        with self.lock:
+            for media_id in media_ids:
+                undone = self.pending.get((opposite, tag_id))
+                if undone and undone.pop(media_id, False):
+                    self.size -= 1
+                bucket = self.pending.setdefault((apply_tags, tag_id), {})
+                if media_id not in bucket:
+                    bucket[media_id] = True
+                    self.size += 1
+            full = self.size >= self.threshold
+        if full:
+            self.flush()
+
+    def add_tags(self, media_ids, tag_id):
+        """
+        Queue adding a tag to media items.
+        Parameters:
+            media_ids (int or list): The ID(s) of the media items.
+            tag_id (int): The ID of the tag.
+        """
+        self.queue("add", media_ids, tag_id)
+
+    def remove_tags(self, media_ids, tag_id):
+        """
+        Queue removing a tag from media items.
+        Parameters:
+            media_ids (int or list): The ID(s) of the media items.
+            tag_id (int): The ID of the tag.
+        """
+        self.queue("remove", media_ids, tag_id)
+
+    def flush(self):
+        """
+        Send every queued edit.
+        Returns:
+            int: The number of editor calls made, before chunking.
+        """
+        with self.lock:
+            pending, self.pending, self.size = self.pending, {}, 0
+        # Tags applied to exactly the same media go in one request
+        groups = {}
+        for (apply_tags, tag_id), media_ids in pending.items():
+            if media_ids:
+                groups.setdefault((apply_tags, tuple(media_ids)), []).append(tag_id)
+        for (apply_tags, media_ids), tag_ids in groups.items():
+            self.app.edit_tags(list(media_ids), tag_ids, apply_tags)
+        if groups:
+            self.app.logger.debug(f"Sent {sum(len(media_ids) for media_ids in pending.values())} queued tag edits in {len(groups)} editor calls")
+        return len(groups)
+
+finished_command_states = ("completed", "failed", "aborted", "cancelled", "orphaned")
+
+class CommandHandle:
+    def __init__(self, command):
+        """
+        Initialize the CommandHandle class.
+        Tracks a command sent to the ARR instance until StARR.wait_for() sees it finish.
+        Parameters:
+            command (dict): The JSON response from posting the command.
+        """
+        self.command = command or {}
+        self.id = self.command.get("id")
+        self.name = self.command.get("name")
+        self.status = self.command.get("status")
+        self.started = time.monotonic()
+        self.finished = None
+
+    def __getitem__(self, key):
+        return self.command[key]
+
+    def update(self, command):
+        """
+        Update the handle from a newer copy of the command.
+        Parameters:
+            command (dict): The command as returned by /api/v3/command.
+        """
+        self.command = command
+        self.status = command.get("status")
+        if self.done and self.finished is None:
+            self.finished = time.monotonic()
+
+    @property
+    def done(self):
+        return self.status in finished_command_states
+
+    @property
+    def duration(self):
+        """
+        Seconds from sending the command until it finished, or until now if it is still running.
+        """
+        return (self.finished or time.monotonic()) - self.started
+
+    def __repr__(self):
+        return f"CommandHandle(id={self.id}, name={self.name}, status={self.status})"
+
+class TagRegistry:
+    def __init__(self, app):
+        """
+        Initialize the TagRegistry class.
+        The tag list is loaded once on first use and kept in sync with tags created through StARR.
+        Parameters:
+            app (StARR): The StARR object the tags belong to.
+        """
+        self.app = app
+        self.ids = None
+        self.lock = threading.RLock()
+
+    def load(self, refresh=False):
+        """
+        Load the tag list from the ARR instance if it hasn't been loaded yet.
+        Parameters:
+            refresh (bool): Reload the tag list even if it has already been loaded.
+        Returns:
+            dict: A dictionary of lowercase tag labels to tag IDs.
+        """
+        with self.lock:
+            if self.ids is None or refresh:
+                self.ids = {tag["label"].lower(): tag["id"] for tag in self.app.get_all_tags() or []}
+            return self.ids
+
+    def get_id(self, label):
+        """
+        Get the ID of a tag from its label, ignoring case.
+        Parameters:
+            label (str): The label of the tag.
+        Returns:
+            int: The ID of the tag, None if it doesn't exist.
+        """
+        return self.load().get(label.lower())
+
+    def add(self, label, tag_id):
+        """
+        Record a tag that was created after the tag list was loaded.
+        Parameters:
+            label (str): The label of the tag.
+            tag_id (int): The ID of the tag.
+        """
+        with self.lock:
+            if self.ids is not None:
+                self.ids[label.lower()] = tag_id
+
+    def ensure_tags(self, labels):
+        """
+        Get the IDs of several tags, creating any that don't exist yet.
+        Parameters:
+            labels (list): The labels of the tags.
+        Returns:
+            dict: A dictionary of the given labels to tag IDs.
+        """
+        label_to_id = {}
+        with self.lock:
+            ids = self.load()
+            for label in labels:
+                tag_id = ids.get(label.lower())
+                if tag_id is None:
+                    tag_id = self.app.create_tag(label)
+                label_to_id[label] = tag_id
+        return label_to_id
+
 class StARR:
-    def __init__(self, url, api, logger):
+    def __init__(self, url, api, logger, cache=None, instance_type=None, metrics=None, fixtures=None, chunk_size=500, chunk_concurrency=1, snapshot=None, retry_policy=None, rate_limiter=None, deadline=None):
         """
         Initialize the StARR class.
+        No request is made here, the system status is fetched the first time it is needed.
         Parameters:
             url (str): The URL of the ARR instance.
             api (str): The API key to use to connect to the ARR instance.
             logger (logging.Logger): a logger object for logging debug messages.
-        Raises:
-            ValueError: If the URL does not point to a valid ARR instance.
+            cache (ResponseCache): An optional cache for read-heavy endpoints.
+            instance_type (str): 'Radarr' or 'Sonarr', if known from config this skips the system status probe.
+            metrics (RequestMetrics): Where to record request metrics, shared between instances to export a whole run.
+            fixtures (requests.adapters.BaseAdapter): A FixtureRecorder or FixtureReplayer to send every request through.
+            chunk_size (int): The maximum number of IDs sent in one editor or bulk delete request.
+            chunk_concurrency (int): The number of chunks sent at the same time.
+            snapshot (MediaSnapshot): Keep the media list between runs and only fetch what changed.
+            retry_policy (RetryPolicy): How failed requests are retried, defaults to RetryPolicy().
+            rate_limiter (RateLimiter): Limits the request rate and requests in flight, share one between objects for the same instance.
+            deadline (Deadline): A run-wide deadline, request timeouts are shrunk to fit it and requests fail once it has passed.
         """
         self.logger = logger
-        self.max_retries = 5
+        self.retry_policy = retry_policy if retry_policy else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.single_flight = SingleFlight()
         self.timeout = 30
+        self.deadline = deadline
         self.url = url
         self.api = api
+        self.cache = cache
+        self.snapshot = snapshot
+        self.metrics = metrics if metrics else RequestMetrics()
+        self.tag_registry = TagRegistry(self)
+        self.system_status = None
+        self.status_lock = threading.Lock()
+        self._instance_type = instance_type
+        self.chunk_size = max(1, int(chunk_size or 1))
+        self.chunk_concurrency = max(1, int(chunk_concurrency or 1))
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -32,20 +516,22 @@ class StARR:
         }
         self.session = requests.Session()
         self.session.headers.update({"X-Api-Key": self.api})
-        try:
-            status = self.get_system_status()
-            app_name = status.get("appName")
-            app_version = status.get("version")
-            if app_name == 'Radarr':
-                self.instance_type = 'Radarr'
-            elif app_name == 'Sonarr':
-                self.instance_type = 'Sonarr'
-            self.logger.debug(f"Connected to {app_name} v{app_version} at {self.url}")
-        except requests.exceptions.ConnectionError as e:
-            self.logger.error(f"Could not connect to {self.url}: {e}")
-            self.logger.error("Exiting script")
-            sys.exit(1)
-    
+        self.fixtures = fixtures
+        if fixtures:
+            self.session.mount("http://", fixtures)
+            self.session.mount("https://", fixtures)
+
+    @property
+    def instance_type(self):
+        """
+        The type of the ARR instance, 'Radarr' or 'Sonarr', detected from the system status if not given.
+        """
+        if self._instance_type is None:
+            app_name = self.get_system_status().get("appName")
+            if app_name in ('Radarr', 'Sonarr'):
+                self._instance_type = app_name
+        return self._instance_type
+
     def get_instance_name(self):
         """
         Get the name of the ARR instance.
@@ -55,121 +541,309 @@ class StARR:
         status = self.get_system_status()
         return status.get("instanceName")
 
-    def get_system_status(self):
+    def get_system_status(self, refresh=False):
         """
-        Get the system status of the ARR instance.
+        Get the system status of the ARR instance, fetched once and reused for the life of the object.
+        Parameters:
+            refresh (bool): Fetch the system status again even if it has already been fetched.
         Returns:
             dict: The JSON response from the GET request.
         """
-        endpoint = f"{self.url}/api/v3/system/status"
-        return self.make_get_request(endpoint)
-    
+        with self.status_lock:
+            if self.system_status is None or refresh:
+                endpoint = f"{self.url}/api/v3/system/status"
+                self.system_status = self.make_get_request(endpoint)
+                self.logger.debug(f"Connected to {self.system_status.get('appName')} v{self.system_status.get('version')} at {self.url}")
+            return self.system_status
+
+    def request_timeout(self, method, endpoint):
+        """
+        Get the timeout for a request, cut to the time left before the run's deadline.
+        Parameters:
+            method (str): The HTTP method, for the error message.
+            endpoint (str): The URL of the request, for the error message.
+        Returns:
+            float: The timeout in seconds.
+        Raises:
+            DeadlineExceeded: If the run's deadline has passed.
+        """
+        if not self.deadline:
+            return self.timeout
+        remaining = self.deadline.remaining()
+        if remaining <= 0:
+            message = f"{method} request to {endpoint} not sent, the run deadline of {self.deadline.seconds:g}s has passed"
+            self.logger.error(message)
+            raise DeadlineExceeded(message, method=method, endpoint=endpoint)
+        return min(self.timeout, remaining)
+
+    def make_request(self, method, endpoint, headers=None, json=None, stream=False, allow_statuses=()):
+        """
+        Make a request to the ARR instance, retrying timeouts, connection errors and server errors
+        as set by the instance's retry policy. Every attempt waits for the instance's rate limiter, if any,
+        and is recorded in the instance's request metrics. With a deadline each attempt's timeout is cut
+        to the time left and no retry is made that couldn't finish in time.
+        Parameters:
+            method (str): The HTTP method.
+            endpoint (str): The URL to make the request to.
+            headers (dict): The headers to pass to the request.
+            json (dict): The JSON data to pass to the request.
+            stream (bool): Don't read the body up front.
+            allow_statuses (tuple): Error status codes to return instead of raising (eg. 404 for an item that may have been deleted).
+        Returns:
+            requests.Response: The response.
+        Raises:
+            StARRError: If the request fails with a status that isn't retried, or still fails after the last retry.
+            DeadlineExceeded: If the run's deadline has passed.
+        """
+        policy = self.retry_policy
+        template = endpoint_template(self.url, endpoint)
+        attempt = 0
+        while True:
+            response = None
+            self.request_timeout(method, endpoint)
+            start_time = time.monotonic()
+            try:
+                with self.rate_limiter.limit(method) if self.rate_limiter else nullcontext():
+                    # Waiting for the rate limiter may have used up the time left
+                    timeout = self.request_timeout(method, endpoint)
+                    start_time = time.monotonic()
+                    response = self.session.request(method, endpoint, headers=headers, json=json, timeout=timeout, stream=stream)
+                size = 0 if stream else len(response.content)
+                self.metrics.record(self.url, method, template, response.status_code, time.monotonic() - start_time, size)
+                if response.status_code in allow_statuses:
+                    return response
+                response.raise_for_status()
+                return response
+            except requests.exceptions.HTTPError as ex:
+                error = ex
+                retry = policy.should_retry(response)
+                if stream:
+                    # Nobody reads a failed streaming response, read its (small) error body for the log
+                    # and close it so the connection goes back to the pool
+                    try:
+                        response.content
+                    except requests.exceptions.RequestException:
+                        pass
+                    response.close()
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as ex:
+                error = ex
+                retry = True
+                self.metrics.record(self.url, method, template, type(ex).__name__, time.monotonic() - start_time)
+            except requests.exceptions.RequestException as ex:
+                error = ex
+                retry = False
+                self.metrics.record(self.url, method, template, type(ex).__name__, time.monotonic() - start_time)
+            status = response.status_code if response is not None else None
+            if not retry or attempt >= policy.max_retries:
+                break
+            attempt += 1
+            delay = policy.delay(attempt, response)
+            if self.deadline and delay >= self.deadline.remaining():
+                message = f"{method} request to {endpoint} failed and the run deadline of {self.deadline.seconds:g}s leaves no time to retry: {error}"
+                self.logger.error(message)
+                raise DeadlineExceeded(message, method=method, endpoint=endpoint, status=status, response=response)
+            self.logger.warning(f'{method} {template} failed ({error}), retrying in {delay:.1f}s ({attempt}/{policy.max_retries})...')
+            self.metrics.record_retry(self.url, method, template)
+            time.sleep(delay)
+        if attempt:
+            message = f"{method} request to {endpoint} failed after {attempt} retries: {error}"
+        else:
+            message = f"{method} request to {endpoint} failed: {error}"
+        self.logger.error(message)
+        if json is not None:
+            self.logger.debug(f"Payload: {json}")
+        if response is not None:
+            self.logger.debug(f"Response: {response.text}")
+        raise StARRError(message, method=method, endpoint=endpoint, status=status, response=response)
+
     def make_get_request(self, endpoint, headers=None):
         """
         Make a GET request to the ARR instance.
+        Identical GETs made at the same time from several threads share one request and its decoded response.
         Parameters:
-            url (str): The URL to make the GET request to.
-            params (dict): The parameters to pass to the GET request.
+            endpoint (str): The URL to make the GET request to.
+            headers (dict): The headers to pass to the GET request.
         Returns:
             dict: The JSON response from the GET request.
         Raises:
-            requests.exceptions.ConnectionError: If the GET request fails.
+            StARRError: If the GET request fails.
         """
-        response = None
-        for i in range(self.max_retries):
-            try:
-                response = self.session.get(endpoint, headers=headers, timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
-            except (requests.exceptions.Timeout, requests.exceptions.HTTPError) as ex:
-                self.logger.warning(f'GET request failed ({ex}), retrying ({i+1}/{self.max_retries})...')
-        self.logger.error(f'GET request failed after {self.max_retries} retries with response: {response.text}')
-        self.logger.error(f"endpoint: {endpoint}")
-        self.logger.error(f"response: {response}")
-        self.logger.error(f"exiting script")
-        sys.exit(1)
-    
+        return self.single_flight.do(endpoint, lambda: decode_json(self.make_request("GET", endpoint, headers=headers)))
+
+    def make_streaming_get_request(self, endpoint, headers=None, chunk_size=65536):
+        """
+        Make a GET request to the ARR instance and decode the JSON array in the response as it arrives.
+        Only establishing the request is retried, an error part way through the body is raised.
+        Parameters:
+            endpoint (str): The URL to make the GET request to.
+            headers (dict): The headers to pass to the GET request.
+            chunk_size (int): The number of bytes to read from the response at a time.
+        Yields:
+            Each element of the JSON array in the response.
+        """
+        response = self.make_request("GET", endpoint, headers=headers, stream=True)
+        size = 0
+        def chunks():
+            nonlocal size
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                size += len(chunk)
+                yield chunk
+        try:
+            with response:
+                yield from iter_json_array(chunks())
+        finally:
+            self.metrics.record_bytes(self.url, "GET", endpoint_template(self.url, endpoint), size)
+
+    def make_cached_get_request(self, name, endpoint, headers=None):
+        """
+        Make a GET request, serving it from the cache when one is configured.
+        Parameters:
+            name (str): The endpoint name used to pick the cache TTL.
+            endpoint (str): The URL to make the GET request to.
+            headers (dict): The headers to pass to the GET request.
+        Returns:
+            dict: The JSON response from the GET request.
+        """
+        if not self.cache:
+            return self.make_get_request(endpoint, headers=headers)
+        hit, response = self.cache.get(self.url, name, endpoint)
+        if hit:
+            self.logger.debug(f"Cache hit: {endpoint}")
+            return response
+        response = self.make_get_request(endpoint, headers=headers)
+        self.cache.set(self.url, name, endpoint, response)
+        return response
+
+    def mark_media_dirty(self, media_ids):
+        """
+        Have the next incremental sync fetch media changed by a call again.
+        Parameters:
+            media_ids (int or list): The IDs of the changed media.
+        """
+        if self.snapshot:
+            if isinstance(media_ids, int):
+                media_ids = [media_ids]
+            self.snapshot.mark_dirty(self.url, "series" if self.instance_type == 'Sonarr' else "movie", list(media_ids))
+
+    def invalidate_cache(self, name):
+        """
+        Drop cached responses for an endpoint after a call that changes it.
+        Parameters:
+            name (str): The endpoint name to invalidate.
+        """
+        if self.cache:
+            self.cache.invalidate(self.url, name)
+
     def make_post_request(self, endpoint, headers=None, json=None):
         """
         Make a POST request to the ARR instance.
         Parameters:
-            url (str): The URL to make the POST request to.
+            endpoint (str): The URL to make the POST request to.
             headers (dict): The headers to pass to the POST request.
             json (dict): The JSON data to pass to the POST request.
         Returns:
             dict: The JSON response from the POST request.
         Raises:
-            requests.exceptions.ConnectionError: If the POST request fails.
+            StARRError: If the POST request fails.
         """
-        response = None
-        for i in range(self.max_retries):
-            try:
-                response = self.session.post(endpoint, headers=headers, json=json, timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
-            except (requests.exceptions.Timeout, requests.exceptions.HTTPError) as ex:
-                self.logger.warning(f'POST request failed ({ex}), retrying ({i+1}/{self.max_retries})...')
-        self.logger.error(f'GET request failed after {self.max_retries} retries with response: {response.text}')
-        self.logger.error(f"endpoint: {endpoint}")
-        self.logger.error(f"Payload: {json}")
-        self.logger.error(f"response: {response}")
-        self.logger.error(f"exiting script")
-        sys.exit(1)
+        return decode_json(self.make_request("POST", endpoint, headers=headers, json=json))
 
-    
     def make_put_request(self, endpoint, headers=None, json=None):
         """
         Make a PUT request to the ARR instance.
         Parameters:
-            url (str): The URL to make the PUT request to.
+            endpoint (str): The URL to make the PUT request to.
             headers (dict): The headers to pass to the PUT request.
             json (dict): The JSON data to pass to the PUT request.
         Returns:
             dict: The JSON response from the PUT request.
         Raises:
-            requests.exceptions.ConnectionError: If the PUT request fails.
+            StARRError: If the PUT request fails.
         """
-        response = None
-        for i in range(self.max_retries):
-            try:
-                response = self.session.put(endpoint, headers=headers, json=json, timeout=self.timeout)
-                response.raise_for_status()
-                return response.json()
-            except (requests.exceptions.Timeout, requests.exceptions.HTTPError) as ex:
-                self.logger.warning(f'PUT request failed ({ex}), retrying ({i+1}/{self.max_retries})...')
-        self.logger.error(f'GET request failed after {self.max_retries} retries with response: {response.text}')
-        self.logger.error(f"endpoint: {endpoint}")
-        self.logger.error(f"Payload: {json}")
-        self.logger.error(f"response: {response}")
-        self.logger.error(f"exiting script")
-        sys.exit(1)
+        return decode_json(self.make_request("PUT", endpoint, headers=headers, json=json))
 
     def make_delete_request(self, endpoint, json=None, headers=None):
         """
         Make a DELETE request to the ARR instance.
         Parameters:
-            url (str): The URL to make the DELETE request to.
+            endpoint (str): The URL to make the DELETE request to.
+            json (dict): The JSON data to pass to the DELETE request.
             headers (dict): The headers to pass to the DELETE request.
         Returns:
-            dict: The JSON response from the DELETE request.
+            requests.Response: The response from the DELETE request.
         Raises:
-            requests.exceptions.ConnectionError: If the DELETE request fails.
+            StARRError: If the DELETE request fails.
         """
-        response = None
-        for i in range(self.max_retries):
-            try:
-                response = self.session.delete(endpoint, headers=headers, json=json, timeout=self.timeout)
-                response.raise_for_status()
-                return response
-            except (requests.exceptions.Timeout, requests.exceptions.HTTPError) as ex:
-                self.logger.warning(f'DELETE request failed ({ex}), retrying ({i+1}/{self.max_retries})...')
-        self.logger.error(f'GET request failed after {self.max_retries} retries with response: {response.text}')
-        self.logger.error(f"endpoint: {endpoint}")
-        self.logger.error(f"Payload: {json}")
-        self.logger.error(f"response: {response}")
-        self.logger.error(f"exiting script")
-        sys.exit(1)
-    
+        return self.make_request("DELETE", endpoint, headers=headers, json=json)
+
+    def send_chunked(self, func, ids):
+        """
+        Split a list of IDs into chunks of chunk_size and call func once per chunk,
+        up to chunk_concurrency chunks at a time.
+        Parameters:
+            func (callable): Called with each chunk of IDs.
+            ids (list): The IDs to split.
+        Returns:
+            list: The return values of func in chunk order.
+        """
+        chunks = [ids[i:i + self.chunk_size] for i in range(0, len(ids), self.chunk_size)]
+        if len(chunks) > 1:
+            self.logger.debug(f"Sending {len(ids)} IDs in {len(chunks)} chunks of up to {self.chunk_size}")
+        if self.chunk_concurrency == 1 or len(chunks) == 1:
+            return [func(chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=min(self.chunk_concurrency, len(chunks))) as executor:
+            return list(executor.map(func, chunks))
+
+    def edit_tags(self, media_ids, tag_id, apply_tags):
+        """
+        Add or remove tags through the editor endpoint, in chunks.
+        Parameters:
+            media_ids (int or list): The IDs of the media items to edit.
+            tag_id (int or list): The ID(s) of the tags.
+            apply_tags (str): 'add' or 'remove'.
+        Returns:
+            list: The edited media items.
+        """
+        id_type = None
+        media = None
+        if isinstance(media_ids, int):
+            media_ids = [media_ids]
+        tag_ids = list(tag_id) if isinstance(tag_id, (list, tuple, set, frozenset)) else [tag_id]
+        if self.instance_type == 'Sonarr':
+            media = "series"
+            id_type = "seriesIds"
+        elif self.instance_type == 'Radarr':
+            media = "movie"
+            id_type = "movieIds"
+        endpoint = f"{self.url}/api/v3/{media}/editor"
+
+        def send(chunk):
+            payload = {
+                id_type: chunk,
+                "tags": tag_ids,
+                "applyTags": apply_tags
+            }
+            self.logger.debug(f"{apply_tags.capitalize()} tag payload: {len(chunk)} {media} with tags {tag_ids}")
+            return self.make_put_request(endpoint, json=payload)
+        responses = self.send_chunked(send, list(media_ids))
+        self.invalidate_cache("media")
+        self.mark_media_dirty(media_ids)
+        edited = []
+        for response in responses:
+            if isinstance(response, list):
+                edited.extend(response)
+        return edited
+
+    def batch(self, threshold=5000):
+        """
+        Start collecting tag edits to send together, see MutationBatcher.
+        Parameters:
+            threshold (int): Flush once this many edits are waiting.
+        Returns:
+            MutationBatcher: Use with a 'with' statement so the edits are sent at the end of the block.
+        """
+        return MutationBatcher(self, threshold=threshold)
+
     def get_movie_fileid(self, movie_id):
         """
         Get the file for a movie.
@@ -185,19 +859,134 @@ class StARR:
                 print(f"Found file ID {r['id']} for movie ID {movie_id}")
                 exit()
 
-    def get_media(self):
+    def media_endpoint(self, options=None):
         """
-        Get all media from the ARR instance.
+        Build the URL of the movie/series list.
+        Sonarr is asked to leave out season images, which the scripts never use.
+        Parameters:
+            options (dict): Extra query parameters for the list (eg. {"includeSeasonImages": True}), they override the defaults.
         Returns:
-            list: A list of media objects.
+            str: The URL.
         """
-        media = None
         if self.instance_type == 'Sonarr':
             media = "series"
-        elif self.instance_type == 'Radarr':
+            query = {"includeSeasonImages": False}
+        else:
             media = "movie"
+            query = {}
+        query.update(options or {})
+        query = {key: str(value).lower() if isinstance(value, bool) else value for key, value in query.items()}
         endpoint = f"{self.url}/api/v3/{media}"
-        return self.make_get_request(endpoint)
+        if query:
+            endpoint = f"{endpoint}?{urlencode(query)}"
+        return endpoint
+
+    def get_media(self, fields=None, options=None):
+        """
+        Get all media from the ARR instance.
+        Parameters:
+            fields (list): Only keep these fields, returning compact MediaRecord objects instead of full dicts.
+            options (dict): Extra query parameters for the list, see media_endpoint(). Not used with a snapshot.
+        Returns:
+            list: A list of media objects.
+        """
+        if fields:
+            return list(self.iter_media(fields=fields, options=options))
+        if self.snapshot:
+            return self.sync_media()
+        return self.make_cached_get_request("media", self.media_endpoint(options))
+
+    def iter_media(self, fields=None, options=None):
+        """
+        Stream all media from the ARR instance one object at a time.
+        When a cache or snapshot is configured the full list is fetched through get_media() instead so it can be reused.
+        Parameters:
+            fields (list): Only keep these fields, yielding compact MediaRecord objects instead of full dicts.
+            options (dict): Extra query parameters for the list, see media_endpoint().
+        Yields:
+            dict: A media object.
+        """
+        if self.cache or self.snapshot:
+            items = self.get_media(options=options)
+        else:
+            items = self.make_streaming_get_request(self.media_endpoint(options))
+        if not fields:
+            yield from items
+            return
+        record_type = media_record_type(fields)
+        for item in items:
+            yield record_type.from_dict(item)
+
+    def get_media_item(self, media_id):
+        """
+        Get a single media item.
+        Parameters:
+            media_id (int): The ID of the movie or series.
+        Returns:
+            dict: The media object, or None if it no longer exists.
+        """
+        media = "series" if self.instance_type == 'Sonarr' else "movie"
+        response = self.make_request("GET", f"{self.url}/api/v3/{media}/{media_id}", allow_statuses=(404,))
+        if response.status_code == 404:
+            return None
+        return decode_json(response)
+
+    def sync_media(self):
+        """
+        Bring the media snapshot up to date and return it.
+        Items with history since the last sync, or changed by the scripts, are fetched one by one.
+        The whole list is downloaded when there is no snapshot, the full resync interval has passed,
+        or so many items changed that one big request is cheaper.
+        Returns:
+            list: A list of media objects.
+        """
+        media = "series" if self.instance_type == 'Sonarr' else "movie"
+        id_key = "seriesId" if self.instance_type == 'Sonarr' else "movieId"
+        started = time.time()
+        state = self.snapshot.load(self.url, media)
+        dirty = self.snapshot.dirty_ids(self.url, media)
+        changed = None
+        if not self.snapshot.needs_full_resync(state):
+            # Overlap the window a little so history written while the last sync ran isn't missed
+            since = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(state["synced"] - 300))
+            history = self.make_get_request(f"{self.url}/api/v3/history/since?{urlencode({'date': since})}") or []
+            changed = dirty | {record[id_key] for record in history if record.get(id_key)}
+            if len(changed) > max(100, len(state["items"]) // 10):
+                self.logger.debug(f"Snapshot: {len(changed)} {media} changed, downloading everything instead")
+                changed = None
+        if changed is None:
+            items = self.make_get_request(self.media_endpoint())
+            self.snapshot.save(self.url, media, {"synced": started, "full_synced": started, "items": items})
+            self.snapshot.clear_dirty(self.url, media)
+            self.logger.debug(f"Snapshot: downloaded all {len(items)} {media}")
+            return items
+        items = {item["id"]: item for item in state["items"]}
+        for media_id in sorted(changed):
+            item = self.get_media_item(media_id)
+            if item is None:
+                items.pop(media_id, None)
+            else:
+                items[media_id] = item
+        items = list(items.values())
+        # Save even when nothing changed so the next history query starts from this sync
+        self.snapshot.save(self.url, media, {"synced": started, "full_synced": state["full_synced"], "items": items})
+        if changed:
+            self.snapshot.clear_dirty(self.url, media)
+            self.logger.debug(f"Snapshot: {len(changed)} of {len(items)} {media} fetched again")
+        else:
+            self.logger.debug(f"Snapshot: no {media} changed since the last sync")
+        return items
+
+    def get_series_seasons(self, series_id):
+        """
+        Get the seasons of a series with up to date statistics, for scripts that list series without them.
+        Parameters:
+            series_id (int): The ID of the series.
+        Returns:
+            list: The seasons of the series, empty if the series no longer exists.
+        """
+        series = self.get_media_item(series_id)
+        return series.get("seasons", []) if series else []
 
     def get_all_tags(self):
         """
@@ -206,7 +995,7 @@ class StARR:
             list: A list of tag objects.
         """
         endpoint = f"{self.url}/api/v3/tag"
-        return self.make_get_request(endpoint)
+        return self.make_cached_get_request("tags", endpoint)
 
     def create_tag(self, tag):
         """
@@ -222,59 +1011,31 @@ class StARR:
         self.logger.debug(f"Create tag payload: {payload}")
         endpoint = f"{self.url}/api/v3/tag"
         response = self.make_post_request(endpoint, json=payload)
+        self.invalidate_cache("tags")
+        self.tag_registry.add(response.get('label', tag), response['id'])
         return response['id']
 
     def add_tags(self, media_id, tag_id):
         """
-        Add a tag to a media item.
+        Add a tag to media items, large lists are sent in chunks.
         Parameters:
-            media_id (int): The ID of the media item to add the tag to.
-            tag_id (int): The ID of the tag to add to the media item.
+            media_id (int or list): The ID(s) of the media items to add the tag to.
+            tag_id (int): The ID of the tag to add to the media items.
         Returns:
-            dict: The JSON response from the POST request.
+            list: The edited media items.
         """
-        id_type = None
-        media = None
-        if isinstance(media_id, int):
-            media_id = [media_id]
-        if self.instance_type == 'Sonarr':
-            media = "series"
-            id_type = "seriesIds"
-        elif self.instance_type == 'Radarr':
-            media = "movie"
-            id_type = "movieIds"
-        payload = {
-            id_type: media_id,
-            "tags": [tag_id],
-            "applyTags": "add"
-        }
-        self.logger.debug(f"Add tag payload: {payload}")
-        endpoint = f"{self.url}/api/v3/{media}/editor"
-        return self.make_put_request(endpoint, json=payload)
+        return self.edit_tags(media_id, tag_id, "add")
 
     def remove_tags(self, media_ids, tag_id):
         """
-        Remove a tag from all media.
+        Remove a tag from media items, large lists are sent in chunks.
         Parameters:
             media_ids (list): A list of media IDs to remove the tag from.
             tag_id (int): The ID of the tag to remove from the media.
+        Returns:
+            list: The edited media items.
         """
-        id_type = None
-        media = None
-        if self.instance_type == 'Sonarr':
-            media = "series"
-            id_type = "seriesIds"
-        elif self.instance_type == 'Radarr':
-            media = "movie"
-            id_type = "movieIds"
-        payload = {
-            id_type: media_ids,
-            "tags": [tag_id],
-            "applyTags": "remove"
-        }
-        self.logger.debug(f"Remove tag payload: {payload}")
-        endpoint = f"{self.url}/api/v3/{media}/editor"
-        return self.make_put_request(endpoint, json=payload)
+        return self.edit_tags(media_ids, tag_id, "remove")
     
     def get_rename_list(self, media_id):
         """
@@ -311,8 +1072,10 @@ class StARR:
             id_type: media_ids,
         }
         self.logger.debug(f"Rename payload: {payload}")
-        endpoint = f"{self.url}/api/v3/command"
-        return self.make_post_request(endpoint, json=payload)
+        handle = self.send_command(payload)
+        self.invalidate_cache("media")
+        self.mark_media_dirty(media_ids)
+        return handle
     
     def refresh_media(self, media_ids):
         """
@@ -347,20 +1110,24 @@ class StARR:
             id_type: media_ids
         }
         self.logger.debug(f"Refresh payload: {payload}")
-        endpoint = f"{self.url}/api/v3/command"
-        return self.make_post_request(endpoint, headers=self.headers, json=payload)
+        self.mark_media_dirty(media_ids)
+        return self.send_command(payload, headers=self.headers)
     
     def search_media(self, media_id):
         """
         Search for a media item.
         Parameters:
             media_id (int): The ID of the media item to search for.
+        Returns:
+            list: The CommandHandles of the searches sent.
         """
         name_type = None
         id_type = None
+        handles = []
         self.logger.debug(f"Media ID: {media_id}")
-        endpoint = f"{self.url}/api/v3/command"
         if self.instance_type == 'Sonarr':
+            if isinstance(media_id, int):
+                media_id = [media_id]
             for id in media_id:
                 name_type = "SeriesSearch"
                 id_type = "seriesId"
@@ -369,7 +1136,7 @@ class StARR:
                     id_type: id
                 }
                 self.logger.debug(f"Search payload: {payload}")
-                self.make_post_request(endpoint, json=payload)
+                handles.append(self.send_command(payload))
         elif self.instance_type == 'Radarr':
             name_type = "MoviesSearch"
             id_type = "movieIds"
@@ -382,8 +1149,9 @@ class StARR:
                 id_type: id
             }
             self.logger.debug(f"Search payload: {payload}")
-            self.make_post_request(endpoint, json=payload)
-    
+            handles.append(self.send_command(payload))
+        return handles
+
     def search_season(self, media_id, season_number):
         """
         Search for a series by ID.
@@ -397,8 +1165,7 @@ class StARR:
             "seriesId": media_id,
             "SeasonNumber": season_number
             }
-        endpoint = f"{self.url}/api/v3/command"
-        return self.make_post_request(endpoint, json=payload)
+        return self.send_command(payload)
     
     def get_season_data(self, media_id):
         """
@@ -413,27 +1180,50 @@ class StARR:
 
     def delete_episode_files(self, media_id):
         """
-        Delete all episode files for a series.
+        Delete episode files with the bulk endpoint, large lists are sent in chunks.
         Parameters:
-            media_id (int): The ID of the series to delete episode files for
+            media_id (int or list): The ID(s) of the episode files to delete
         """
         if isinstance(media_id, int):
             media_id = [media_id]
-        payload = {
-            "episodeFileIds": media_id
-        }
-        self.logger.debug(f"Delete episode files payload: {payload}")
         endpoint = f"{self.url}/api/v3/episodefile/bulk"
-        return self.make_delete_request(endpoint, payload)
+
+        def send(chunk):
+            payload = {
+                "episodeFileIds": chunk
+            }
+            self.logger.debug(f"Delete episode files payload: {payload}")
+            return self.make_delete_request(endpoint, payload)
+        responses = self.send_chunked(send, list(media_id))
+        self.invalidate_cache("media")
+        return responses
 
     def delete_movie_file(self, media_id):
         """
-        Delete a media item.
+        Delete movie files. A single file is deleted by ID, several files use the bulk endpoint
+        and large lists are sent in chunks.
         Parameters:
-            media_id (int): The ID of the media item to delete.
+            media_id (int or list): The ID(s) of the movie files to delete.
         """
-        endpoint = f"{self.url}/api/v3/moviefile/{media_id}"
-        return self.make_delete_request(endpoint)
+        if isinstance(media_id, int):
+            media_id = [media_id]
+        media_id = list(media_id)
+        if len(media_id) == 1:
+            endpoint = f"{self.url}/api/v3/moviefile/{media_id[0]}"
+            responses = [self.make_delete_request(endpoint)]
+            self.invalidate_cache("media")
+            return responses
+        endpoint = f"{self.url}/api/v3/moviefile/bulk"
+
+        def send(chunk):
+            payload = {
+                "movieFileIds": chunk
+            }
+            self.logger.debug(f"Delete movie files payload: {payload}")
+            return self.make_delete_request(endpoint, payload)
+        responses = self.send_chunked(send, media_id)
+        self.invalidate_cache("media")
+        return responses
 
     def search_episodes(self, episode_ids):
         """
@@ -442,20 +1232,47 @@ class StARR:
             media_id (int): The ID of the series to search for
             fileIds (int): The episode number to search for
         """
-        endpoint = f"{self.url}/api/v3/command"
         payload = {
             "name": "EpisodeSearch",
             "episodeIds": episode_ids
         }
         self.logger.debug(f"Search payload: {payload}")
-        return self.make_post_request(endpoint, json=payload)
+        return self.send_command(payload)
         
     def get_queue(self):
         """
         Get the queue.
+        Note: Only the first page of the queue is returned, use iter_queue() to walk the whole queue.
         """
         endpoint = f"{self.url}/api/v3/queue"
         return self.make_get_request(endpoint, headers=self.headers)
+
+    def iter_queue(self, page_size=250, params=None, status_messages_only=False):
+        """
+        Walk every page of the queue, yielding records as each page arrives.
+        Parameters:
+            page_size (int): The number of records to request per page.
+            params (dict): Extra query parameters passed to the server to filter the queue (eg. {"status": "completed"}).
+            status_messages_only (bool): Only yield records that have status messages or an error message.
+        Yields:
+            dict: A queue record.
+        """
+        page = 1
+        while True:
+            query = {"page": page, "pageSize": page_size}
+            if params:
+                query.update(params)
+            endpoint = f"{self.url}/api/v3/queue?{urlencode(query)}"
+            response = self.make_get_request(endpoint, headers=self.headers)
+            records = response.get("records", [])
+            for record in records:
+                if status_messages_only and not (record.get("statusMessages") or record.get("errorMessage")):
+                    continue
+                yield record
+            total_records = response.get("totalRecords", 0)
+            if not records or page * page_size >= total_records:
+                break
+            page += 1
     
     def get_quality_profile_names(self):
         """
@@ -463,7 +1280,7 @@ class StARR:
         """
         dict_of_names_and_ids = {}
         endpoint = f"{self.url}/api/v3/qualityprofile"
-        response = self.make_get_request(endpoint, headers=self.headers)
+        response = self.make_cached_get_request("quality_profiles", endpoint, headers=self.headers)
         if response:
             for profile in response:
                 dict_of_names_and_ids[profile["name"]] = profile["id"]
@@ -473,12 +1290,65 @@ class StARR:
         """
         Refresh the queue.
         """
-        endpoint = f"{self.url}/api/v3/command"
         payload = {
             "name": "RefreshMonitoredDownloads"
         }
         self.logger.debug(f"Refresh queue payload: {payload}")
-        return self.make_post_request(endpoint, json=payload)
+        return self.send_command(payload)
+
+    def send_command(self, payload, headers=None):
+        """
+        Send a command to the ARR instance.
+        Parameters:
+            payload (dict): The command payload.
+            headers (dict): The headers to pass to the POST request.
+        Returns:
+            CommandHandle: A handle to pass to wait_for().
+        """
+        endpoint = f"{self.url}/api/v3/command"
+        return CommandHandle(self.make_post_request(endpoint, headers=headers, json=payload))
+
+    def wait_for(self, handles, timeout=600, interval=5):
+        """
+        Wait for commands to finish, never past the run's deadline.
+        All outstanding commands are checked with a single request to /api/v3/command per interval,
+        commands that have dropped off that list are looked up by ID.
+        Parameters:
+            handles (CommandHandle or list): The commands to wait for, nested lists are flattened.
+            timeout (int): The maximum number of seconds to wait.
+            interval (int): The number of seconds between polls.
+        Returns:
+            bool: True if every command finished within the timeout.
+        """
+        pending = {}
+        stack = [handles]
+        while stack:
+            handle = stack.pop()
+            if isinstance(handle, (list, tuple)):
+                stack.extend(handle)
+            elif handle is not None and handle.id is not None and not handle.done:
+                pending[handle.id] = handle
+        if self.deadline:
+            timeout = min(timeout, self.deadline.remaining())
+        deadline = time.monotonic() + timeout
+        while pending:
+            commands = self.make_get_request(f"{self.url}/api/v3/command", headers=self.headers) or []
+            commands = {command.get("id"): command for command in commands}
+            for command_id, handle in list(pending.items()):
+                command = commands.get(command_id)
+                if command is None:
+                    command = self.make_get_request(f"{self.url}/api/v3/command/{command_id}", headers=self.headers)
+                handle.update(command)
+                if handle.done:
+                    self.logger.debug(f"Command {handle.name} ({command_id}) {handle.status} after {handle.duration:.1f}s")
+                    del pending[command_id]
+            if not pending:
+                break
+            if time.monotonic() + interval > deadline:
+                self.logger.warning(f"Timed out after {timeout}s waiting for commands: {list(pending.values())}")
+                return False
+            time.sleep(interval)
+        return True
 
     def get_health(self):
         """
@@ -498,7 +1368,10 @@ class StARR:
             endpoint = f"{self.url}/api/v3/series/{media_id}"
         elif instance_type == 'Radarr':
             endpoint = f"{self.url}/api/v3/movie/{media_id}"
-        return self.make_delete_request(endpoint)
+        response = self.make_delete_request(endpoint)
+        self.invalidate_cache("media")
+        self.mark_media_dirty(media_id)
+        return response
 
     def get_tag_id_from_name(self, tag_name):
         """
@@ -508,13 +1381,7 @@ class StARR:
         Returns:
             int: The ID of the tag.
         """
-        all_tags = self.get_all_tags()
-        tag_name = tag_name.lower()
-        for tag in all_tags:
-            if tag["label"] == tag_name:
-                tag_id = tag["id"]
-                return tag_id
-        return None
+        return self.tag_registry.get_id(tag_name)
     
     def remove_item_from_queue(self, queue_id, blocklist):
         """
@@ -523,4 +1390,100 @@ class StARR:
             queue_id (int): The ID of the queue item to remove.
         """
         endpoint = f"{self.url}/api/v3/queue/{queue_id}?removeFromClient=false&blocklist={blocklist}&skipRedownload=true"
-        return self.make_delete_request(endpoint)
\ No newline at end of file
+        return self.make_delete_request(endpoint)
+
+class AsyncStARR:
+    def __init__(self, url, api, logger, concurrency=8, app=None):
+        """
+        Initialize the AsyncStARR class.
+        Every StARR method is exposed as a coroutine, calls are run on a thread pool
+        sized to the concurrency cap so at most that many requests are in flight at once.
+        Parameters:
+            url (str): The URL of the ARR instance.
+            api (str): The API key to use to connect to the ARR instance.
+            logger (logging.Logger): a logger object for logging debug messages.
+            concurrency (int): The maximum number of requests in flight for this instance.
+            app (StARR): An existing StARR object to wrap instead of creating a new one.
+        """
+        self.logger = logger
+        self.concurrency = max(1, int(concurrency or 1))
+        self.app = app if app else StARR(url, api, logger)
+        # Size the connection pool to the cap so threads don't fight over connections,
+        # the adapters it replaces are put back by close()
+        self.adapter = None
+        self.replaced_adapters = {}
+        if not self.app.fixtures:
+            self.adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+            for prefix in ("http://", "https://"):
+                self.replaced_adapters[prefix] = self.app.session.adapters.get(prefix)
+                self.app.session.mount(prefix, self.adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def __getattr__(self, name):
+        """
+        Expose StARR methods as coroutines and StARR attributes as-is.
+        """
+        if name == "app":
+            raise AttributeError(name)
+        attr = getattr(self.app, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+        return method
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking call on the instance's thread pool.
+        Parameters:
+            func (callable): The function to run.
+        Returns:
+            The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    async def gather(self, method, items, *args, return_exceptions=False, **kwargs):
+        """
+        Fan out a per-item call across all items.
+        Parameters:
+            method (str or callable): The name of the StARR method, or a coroutine function, to call for each item.
+            items (list): The items to pass as the first argument of each call.
+            return_exceptions (bool): Return exceptions in the results instead of raising the first one.
+        Returns:
+            list: The results in the same order as the items.
+        """
+        func = getattr(self, method) if isinstance(method, str) else method
+        return await asyncio.gather(*(func(item, *args, **kwargs) for item in items), return_exceptions=return_exceptions)
+
+    def map(self, method, items, *args, **kwargs):
+        """
+        Blocking helper for scripts that are not async, runs gather() to completion.
+        Parameters:
+            method (str or callable): The name of the StARR method, or a coroutine function, to call for each item.
+            items (list): The items to pass as the first argument of each call.
+        Returns:
+            list: The results in the same order as the items.
+        """
+        return asyncio.run(self.gather(method, items, *args, **kwargs))
+
+    def close(self):
+        """
+        Shut down the thread pool and give the wrapped StARR object its own connection adapters back.
+        """
+        self.executor.shutdown(wait=True)
+        if self.adapter:
+            for prefix, adapter in self.replaced_adapters.items():
+                if adapter:
+                    self.app.session.mount(prefix, adapter)
+            self.adapter.close()
+            self.adapter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
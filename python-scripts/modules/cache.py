@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import hashlib
+import pathlib
+import threading
+
+base_dir = pathlib.Path(__file__).parent.parent
+
+default_ttls = {
+    "media": 300,
+    "tags": 3600,
+    "quality_profiles": 3600,
+}
+
+def digest(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, ttls=None, cache_dir=None, logger=None):
+        """
+        Initialize the ResponseCache class.
+        Responses are kept in memory for the life of the process and, if a cache_dir is given,
+        written to disk so back-to-back runs on the same host can share them.
+        Parameters:
+            ttls (dict): Seconds to keep each endpoint's responses, keyed by endpoint name. A TTL of 0 disables caching for that endpoint.
+            cache_dir (str): The directory to store the on-disk tier in, None for memory only.
+            logger (logging.Logger): a logger object for logging debug messages.
+        """
+        self.ttls = dict(default_ttls)
+        self.ttls.update(ttls or {})
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self.memory = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def file_prefix(self, scope, name):
+        return f"{digest(scope)[:12]}_{name}_"
+
+    def file_path(self, scope, name, key):
+        return os.path.join(self.cache_dir, f"{self.file_prefix(scope, name)}{digest(key)}.json")
+
+    def count(self, name, result):
+        with self.lock:
+            counters = self.stats.setdefault(name, {"hits": 0, "misses": 0})
+            counters[result] += 1
+
+    def get(self, scope, name, key):
+        """
+        Look up a cached response.
+        Parameters:
+            scope (str): The instance the response belongs to (eg. the instance URL).
+            name (str): The endpoint name used to pick the TTL.
+            key (str): The request key (eg. the full endpoint URL).
+        Returns:
+            tuple: (hit, value), value is None on a miss.
+        """
+        if self.ttls.get(name, 0) <= 0:
+            return False, None
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get((scope, name, key))
+        if entry is None and self.cache_dir:
+            try:
+                with open(self.file_path(scope, name, key), "r") as file:
+                    entry = json.load(file)
+                with self.lock:
+                    self.memory[(scope, name, key)] = entry
+            except (OSError, ValueError):
+                entry = None
+        if entry is not None and entry["expires"] > now:
+            self.count(name, "hits")
+            return True, entry["value"]
+        self.count(name, "misses")
+        return False, None
+
+    def set(self, scope, name, key, value):
+        """
+        Store a response.
+        Parameters:
+            scope (str): The instance the response belongs to (eg. the instance URL).
+            name (str): The endpoint name used to pick the TTL.
+            key (str): The request key (eg. the full endpoint URL).
+            value: The decoded JSON response.
+        """
+        ttl = self.ttls.get(name, 0)
+        if ttl <= 0:
+            return
+        entry = {"expires": time.time() + ttl, "value": value}
+        with self.lock:
+            self.memory[(scope, name, key)] = entry
+        if self.cache_dir:
+            path = self.file_path(scope, name, key)
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "w") as file:
+                    json.dump(entry, file)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError) as e:
+                if self.logger:
+                    self.logger.warning(f"Unable to write cache file {path}: {e}")
+
+    def invalidate(self, scope, name):
+        """
+        Drop every cached response for an endpoint of an instance.
+        Parameters:
+            scope (str): The instance the responses belong to (eg. the instance URL).
+            name (str): The endpoint name to invalidate.
+        """
+        with self.lock:
+            for cache_key in [k for k in self.memory if k[0] == scope and k[1] == name]:
+                del self.memory[cache_key]
+        if self.cache_dir:
+            prefix = self.file_prefix(scope, name)
+            for file in os.listdir(self.cache_dir):
+                if file.startswith(prefix):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, file))
+                    except OSError:
+                        pass
+        if self.logger:
+            self.logger.debug(f"Cache invalidated: {name} for {scope}")
+
+    def log_stats(self):
+        """
+        Log the hit/miss counters for each endpoint.
+        """
+        if not self.logger:
+            return
+        for name, counters in sorted(self.stats.items()):
+            self.logger.debug(f"Cache {name}: {counters['hits']} hits, {counters['misses']} misses")
+
+def load_cache(config, logger):
+    """
+    Build a ResponseCache from the global 'cache' config section.
+    Parameters:
+        config (Config): The loaded config.
+        logger (logging.Logger): a logger object for logging debug messages.
+    Returns:
+        ResponseCache: The cache, or None if caching is not enabled.
+    """
+    cache_data = config.cache_data
+    if not cache_data or not cache_data.get('enabled', False):
+        return None
+    cache_dir = cache_data.get('path') or f'{base_dir}/cache'
+    return ResponseCache(ttls=cache_data.get('ttl', {}), cache_dir=cache_dir, logger=logger)
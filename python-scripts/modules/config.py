@@ -31,6 +31,12 @@ class Config:
         self.sonarr_data = self.global_data.get('sonarr', {})  # Use empty dict if sonarr data is not found
         self.qbit_data = self.global_data.get('qbittorrent', {})  # Use empty dict if qbit data is not found
         self.plex_data = self.global_data.get('plex', {})  # Use empty dict if plex data is not found
+        self.cache_data = self.global_data.get('cache', {})  # Use empty dict if cache data is not found
+        self.metrics_data = self.global_data.get('metrics', {})  # Use empty dict if metrics data is not found
+        self.fixtures_data = self.global_data.get('fixtures', {})  # Use empty dict if fixtures data is not found
+        self.snapshot_data = self.global_data.get('snapshot', {})  # Use empty dict if snapshot data is not found
+        self.rate_limit_data = self.global_data.get('rate_limit', {})  # Use empty dict if rate limit data is not found
+        self.normalize_data = self.global_data.get('normalize', {})  # Use empty dict if normalize data is not found
 
         # Typical variables
         self.log_level = self.script_data.get('log_level', 'info').lower()  # Use 'info' as default log level if not provided
@@ -39,6 +45,11 @@ class Config:
         self.radarr = self.script_data.get('radarr', False)  # Use False as default value for radarr if not provided')
         self.sonarr = self.script_data.get('sonarr', False)  # Use False as default value for sonarr if not provided')
         self.qbit = self.script_data.get('qbittorrent', False)  # Use False as default value for qbit if not provided')
+        self.concurrency = self.script_data.get('concurrency', 8)  # Use 8 as default value for concurrency if not provided
+        self.instance_concurrency = self.script_data.get('instance_concurrency', 4)  # Use 4 as default value for instance_concurrency if not provided
+        self.chunk_size = self.script_data.get('chunk_size', 500)  # Use 500 as default value for chunk_size if not provided
+        self.chunk_concurrency = self.script_data.get('chunk_concurrency', 1)  # Use 1 as default value for chunk_concurrency if not provided
+        self.deadline = self.script_data.get('deadline', 0)  # Use 0 (no deadline) as default value for deadline if not provided
 
         # Plex variables
         self.library_names = self.script_data.get('library_names', [])  # Use empty list as default value for library_names if not provided
@@ -0,0 +1,45 @@
+import time
+
+class Deadline:
+    def __init__(self, seconds):
+        """
+        Initialize the Deadline class.
+        A wall-clock budget for a whole run, started when the object is created.
+        Parameters:
+            seconds (float): The number of seconds the run may take.
+        """
+        self.seconds = float(seconds)
+        self.expires = time.monotonic() + self.seconds
+
+    def remaining(self):
+        """
+        Returns:
+            float: The seconds left, 0 once the deadline has passed.
+        """
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, timeout):
+        """
+        Shrink a timeout so it doesn't run past the deadline.
+        Parameters:
+            timeout (float): The timeout that would be used without a deadline.
+        Returns:
+            float: The smaller of the timeout and the seconds left.
+        """
+        return min(timeout, self.remaining())
+
+def load_deadline(config):
+    """
+    Build a Deadline from the script's 'deadline' option.
+    Parameters:
+        config (Config): The loaded config.
+    Returns:
+        Deadline: The deadline for this run, or None if the script has no deadline.
+    """
+    if not config.deadline:
+        return None
+    return Deadline(config.deadline)
@@ -0,0 +1,165 @@
+import os
+import gzip
+import json
+import time
+import atexit
+import base64
+import pathlib
+import threading
+from datetime import timedelta
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+
+base_dir = pathlib.Path(__file__).parent.parent
+
+class FixtureMissingError(RequestException):
+    """
+    Raised when a replayed request has no recorded response, it is not retried.
+    """
+
+def request_key(method, url, body):
+    """
+    Build the key a request is recorded and replayed under.
+    Parameters:
+        method (str): The HTTP method.
+        url (str): The full URL of the request.
+        body (bytes or str): The request body.
+    Returns:
+        str: The key.
+    """
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    return f"{method} {url} {body or ''}"
+
+class FixtureRecorder(HTTPAdapter):
+    def __init__(self, path, logger=None, **kwargs):
+        """
+        Initialize the FixtureRecorder class.
+        A transport adapter that makes real requests and appends each request and response
+        to a gzip compressed JSON lines fixture file.
+        Parameters:
+            path (str): The fixture file to write.
+            logger (logging.Logger): a logger object for logging debug messages.
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.logger = logger
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        atexit.register(self.finish)
+
+    def send(self, request, **kwargs):
+        start_time = time.monotonic()
+        response = super().send(request, **kwargs)
+        # Reading the content here means a recorded run doesn't stream, replays still can
+        content = response.content
+        record = {
+            "key": request_key(request.method, request.url, request.body),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "elapsed": round(time.monotonic() - start_time, 6),
+            "content": base64.b64encode(content or b"").decode("ascii"),
+        }
+        with self.lock:
+            if self.file:
+                self.file.write(json.dumps(record) + "\n")
+        return response
+
+    def finish(self):
+        """
+        Close the fixture file, this is done automatically at exit.
+        The adapter may be shared by several sessions so closing a session leaves the file open.
+        """
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+                if self.logger:
+                    self.logger.debug(f"Fixture written to {self.path}")
+
+class FixtureReplayer(BaseAdapter):
+    def __init__(self, path, latency=None, logger=None):
+        """
+        Initialize the FixtureReplayer class.
+        A transport adapter that serves responses from a fixture file instead of the network.
+        Identical requests are answered in the order they were recorded, the last answer is repeated once they run out.
+        Parameters:
+            path (str): The fixture file to read.
+            latency (float or str): Seconds to sleep before each response, or 'recorded' to replay the recorded latency.
+            logger (logging.Logger): a logger object for logging debug messages.
+        """
+        super().__init__()
+        self.path = path
+        self.latency = latency
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.records = {}
+        self.positions = {}
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records.setdefault(record["key"], []).append(record)
+        if self.logger:
+            self.logger.debug(f"Loaded {sum(len(r) for r in self.records.values())} recorded responses from {path}")
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request.method, request.url, request.body)
+        with self.lock:
+            records = self.records.get(key)
+            if not records:
+                raise FixtureMissingError(f"No recorded response for {request.method} {request.url} in {self.path}", request=request)
+            position = self.positions.get(key, 0)
+            record = records[min(position, len(records) - 1)]
+            self.positions[key] = position + 1
+        if self.latency == "recorded":
+            delay = record.get("elapsed", 0)
+        else:
+            delay = float(self.latency or 0)
+        if delay:
+            time.sleep(delay)
+        response = Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason")
+        response.headers = CaseInsensitiveDict(record.get("headers", {}))
+        response._content = base64.b64decode(record["content"])
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        return response
+
+    def close(self):
+        pass
+
+def load_fixtures(config, script_name, logger):
+    """
+    Build the fixture adapter from the global 'fixtures' config section.
+    Parameters:
+        config (Config): The loaded config.
+        script_name (str): The name of the script, used to name the fixture file.
+        logger (logging.Logger): a logger object for logging debug messages.
+    Returns:
+        FixtureRecorder or FixtureReplayer: The adapter to mount on each StARR session, or None if fixtures are not enabled.
+    """
+    fixtures_data = config.fixtures_data
+    mode = (fixtures_data or {}).get('mode')
+    if not mode:
+        return None
+    directory = fixtures_data.get('path') or f'{base_dir}/fixtures'
+    path = os.path.join(directory, f"{script_name}.jsonl.gz")
+    if mode == 'record':
+        logger.info(f"Recording Radarr/Sonarr requests to {path}")
+        return FixtureRecorder(path, logger=logger)
+    elif mode == 'replay':
+        logger.info(f"Replaying Radarr/Sonarr requests from {path}")
+        return FixtureReplayer(path, latency=fixtures_data.get('latency'), logger=logger)
+    logger.error(f"Unknown fixtures mode '{mode}', expected 'record' or 'replay'")
+    return None
@@ -0,0 +1,116 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from modules.arrpy import StARR, StARRError
+from modules.ratelimit import get_rate_limiter
+
+class InstanceLogger(logging.LoggerAdapter):
+    """
+    Prefixes every message with the instance name so the logs of instances running side by side can be told apart.
+    """
+    def process(self, msg, kwargs):
+        return f"[{self.extra['instance']}] {msg}", kwargs
+
+class InstanceResult:
+    def __init__(self, instance, value=None, error=None, elapsed=0.0):
+        """
+        Initialize the InstanceResult class.
+        Parameters:
+            instance (dict): The instance, see Fleet.instances().
+            value: What the per-instance function returned.
+            error (StARRError): The error the instance was skipped for, if any.
+            elapsed (float): The seconds the instance took.
+        """
+        self.instance = instance
+        self.name = instance['name']
+        self.instance_type = instance['instance_type']
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+class Fleet:
+    def __init__(self, config, logger, workers=None, **options):
+        """
+        Initialize the Fleet class.
+        Builds a StARR object for each Radarr/Sonarr instance the script is configured for and runs a function
+        across them, several instances at once.
+        Parameters:
+            config (Config): The loaded config.
+            logger (logging.Logger): a logger object for logging messages.
+            workers (int): The number of instances to process at once, defaults to the script's 'instance_concurrency'.
+            **options: Passed on to StARR (cache, metrics, fixtures, snapshot, deadline).
+        """
+        self.config = config
+        self.logger = logger
+        self.workers = max(1, int(workers or config.instance_concurrency or 1))
+        self.options = options
+
+    def instances(self):
+        """
+        Get the instances the script is configured for.
+        Returns:
+            list: One dict per instance with 'instance_type', 'name', 'url', 'api' and 'settings',
+                  the instance's entry in the script's radarr/sonarr section.
+        """
+        instances = []
+        instance_data = {
+            'Radarr': (self.config.radarr_data, self.config.radarr),
+            'Sonarr': (self.config.sonarr_data, self.config.sonarr),
+        }
+        for instance_type, (global_instances, script_instances) in instance_data.items():
+            for instance in global_instances or []:
+                settings = next((data for data in script_instances or [] if data['name'] == instance['name']), None)
+                if settings is None:
+                    continue
+                instances.append({
+                    'instance_type': instance_type,
+                    'name': instance['name'],
+                    'url': instance['url'],
+                    'api': instance['api'],
+                    'settings': settings,
+                })
+        return instances
+
+    def connect(self, instance):
+        """
+        Build the StARR object for an instance, logging with the instance name in front of each message.
+        Parameters:
+            instance (dict): The instance, see instances().
+        Returns:
+            StARR: The StARR object.
+        """
+        logger = InstanceLogger(self.logger, {'instance': instance['name']})
+        return StARR(instance['url'], instance['api'], logger, instance_type=instance['instance_type'], chunk_size=self.config.chunk_size, chunk_concurrency=self.config.chunk_concurrency, rate_limiter=get_rate_limiter(self.config, instance['url']), **self.options)
+
+    def process(self, func, instance):
+        start = time.monotonic()
+        try:
+            value = func(self.connect(instance), instance)
+        except StARRError as e:
+            self.logger.error(f"Skipping {instance['name']}: {e}")
+            return InstanceResult(instance, error=e, elapsed=time.monotonic() - start)
+        return InstanceResult(instance, value=value, elapsed=time.monotonic() - start)
+
+    def run(self, func, instances=None):
+        """
+        Run a function for each instance, up to 'workers' of them at once.
+        An instance that fails with a StARRError is logged and skipped, any other error is raised once the
+        other instances have finished.
+        Parameters:
+            func (callable): Called as func(app, instance) with the instance's StARR object and its dict from instances().
+            instances (list): The instances to run, defaults to instances().
+        Returns:
+            dict: Instance name -> InstanceResult, in config order.
+        """
+        if instances is None:
+            instances = self.instances()
+        if self.workers == 1 or len(instances) <= 1:
+            return {instance['name']: self.process(func, instance) for instance in instances}
+        self.logger.debug(f"Processing {len(instances)} instances, {min(self.workers, len(instances))} at a time")
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(instances))) as executor:
+            futures = [(instance, executor.submit(self.process, func, instance)) for instance in instances]
+        return {instance['name']: future.result() for instance, future in futures}
@@ -0,0 +1,226 @@
+import os
+import re
+import json
+import pathlib
+import threading
+from urllib.parse import urlsplit, parse_qsl
+
+base_dir = pathlib.Path(__file__).parent.parent
+
+latency_buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+numeric_segment_regex = re.compile(r"/\d+(?=/|$)")
+
+def endpoint_template(url, endpoint):
+    """
+    Reduce an endpoint to a template so requests for different items are counted together.
+    Parameters:
+        url (str): The base URL of the ARR instance.
+        endpoint (str): The full URL of the request.
+    Returns:
+        str: The path with numeric IDs replaced by {id} and only the query parameter names kept,
+             eg. /api/v3/moviefile/12 -> /api/v3/moviefile/{id}, /api/v3/rename?movieId=5 -> /api/v3/rename?movieId
+    """
+    if endpoint.startswith(url):
+        endpoint = endpoint[len(url):]
+    parts = urlsplit(endpoint)
+    template = numeric_segment_regex.sub("/{id}", parts.path)
+    if parts.query:
+        keys = sorted({key for key, value in parse_qsl(parts.query, keep_blank_values=True)})
+        template = f"{template}?{'&'.join(keys)}"
+    return template
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+class RequestMetrics:
+    def __init__(self):
+        """
+        Initialize the RequestMetrics class.
+        Counts, latency histograms, response bytes, retries and status codes are kept per
+        instance, HTTP method and endpoint template. One object can be shared by several StARR instances.
+        """
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def entry(self, instance, method, template):
+        key = (instance, method, template)
+        entry = self.endpoints.get(key)
+        if entry is None:
+            entry = {
+                "count": 0,
+                "retries": 0,
+                "bytes": 0,
+                "latency_sum": 0.0,
+                "latency_max": 0.0,
+                "latency_buckets": [0] * (len(latency_buckets) + 1),
+                "status_codes": {},
+            }
+            self.endpoints[key] = entry
+        return entry
+
+    def record(self, instance, method, template, status, seconds, size=0):
+        """
+        Record a finished request.
+        Parameters:
+            instance (str): The instance the request was made to.
+            method (str): The HTTP method.
+            template (str): The endpoint template.
+            status (int or str): The HTTP status code, or a short error name if there was no response.
+            seconds (float): How long the request took.
+            size (int): The number of bytes in the response.
+        """
+        with self.lock:
+            entry = self.entry(instance, method, template)
+            entry["count"] += 1
+            entry["bytes"] += size or 0
+            entry["latency_sum"] += seconds
+            entry["latency_max"] = max(entry["latency_max"], seconds)
+            for i, bound in enumerate(latency_buckets):
+                if seconds <= bound:
+                    entry["latency_buckets"][i] += 1
+                    break
+            else:
+                entry["latency_buckets"][-1] += 1
+            status = str(status)
+            entry["status_codes"][status] = entry["status_codes"].get(status, 0) + 1
+
+    def record_bytes(self, instance, method, template, size):
+        """
+        Add response bytes read after the request was recorded (eg. from a streamed response).
+        """
+        with self.lock:
+            self.entry(instance, method, template)["bytes"] += size
+
+    def record_retry(self, instance, method, template):
+        """
+        Record a retry of a request.
+        """
+        with self.lock:
+            self.entry(instance, method, template)["retries"] += 1
+
+    def summary(self):
+        """
+        Summarize the metrics.
+        Returns:
+            list: One dictionary per instance, method and endpoint template, slowest total time first.
+        """
+        with self.lock:
+            rows = []
+            for (instance, method, template), entry in self.endpoints.items():
+                count = entry["count"]
+                rows.append({
+                    "instance": instance,
+                    "method": method,
+                    "endpoint": template,
+                    "count": count,
+                    "retries": entry["retries"],
+                    "bytes": entry["bytes"],
+                    "total_seconds": round(entry["latency_sum"], 3),
+                    "mean_seconds": round(entry["latency_sum"] / count, 3) if count else 0,
+                    "max_seconds": round(entry["latency_max"], 3),
+                    "latency_buckets": dict(zip([str(bound) for bound in latency_buckets] + ["+Inf"], entry["latency_buckets"])),
+                    "status_codes": dict(entry["status_codes"]),
+                })
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return rows
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=4)
+
+    def to_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format, for node_exporter's textfile collector.
+        Returns:
+            str: The metrics.
+        """
+        lines = [
+            "# HELP arrpy_requests_total Requests made to Radarr/Sonarr by status code.",
+            "# TYPE arrpy_requests_total counter",
+        ]
+        with self.lock:
+            items = sorted(self.endpoints.items())
+            for (instance, method, template), entry in items:
+                labels = f'arr_instance="{escape_label(instance)}",method="{method}",endpoint="{escape_label(template)}"'
+                for status, count in sorted(entry["status_codes"].items()):
+                    lines.append(f'arrpy_requests_total{{{labels},status="{escape_label(status)}"}} {count}')
+            lines += [
+                "# HELP arrpy_request_retries_total Requests to Radarr/Sonarr that were retried.",
+                "# TYPE arrpy_request_retries_total counter",
+            ]
+            for (instance, method, template), entry in items:
+                labels = f'arr_instance="{escape_label(instance)}",method="{method}",endpoint="{escape_label(template)}"'
+                lines.append(f"arrpy_request_retries_total{{{labels}}} {entry['retries']}")
+            lines += [
+                "# HELP arrpy_response_bytes_total Bytes received from Radarr/Sonarr.",
+                "# TYPE arrpy_response_bytes_total counter",
+            ]
+            for (instance, method, template), entry in items:
+                labels = f'arr_instance="{escape_label(instance)}",method="{method}",endpoint="{escape_label(template)}"'
+                lines.append(f"arrpy_response_bytes_total{{{labels}}} {entry['bytes']}")
+            lines += [
+                "# HELP arrpy_request_duration_seconds Latency of requests to Radarr/Sonarr.",
+                "# TYPE arrpy_request_duration_seconds histogram",
+            ]
+            for (instance, method, template), entry in items:
+                labels = f'arr_instance="{escape_label(instance)}",method="{method}",endpoint="{escape_label(template)}"'
+                cumulative = 0
+                for bound, count in zip(list(latency_buckets) + ["+Inf"], entry["latency_buckets"]):
+                    cumulative += count
+                    lines.append(f'arrpy_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"arrpy_request_duration_seconds_sum{{{labels}}} {entry['latency_sum']:.6f}")
+                lines.append(f"arrpy_request_duration_seconds_count{{{labels}}} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory, script_name):
+        """
+        Write the JSON summary and Prometheus textfile for a run.
+        Parameters:
+            directory (str): The directory to write to.
+            script_name (str): The name of the script, used to name the files.
+        Returns:
+            tuple: The paths of the JSON and Prometheus files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{script_name}_metrics.json")
+        prom_path = os.path.join(directory, f"{script_name}.prom")
+        write_atomic(json_path, self.to_json())
+        write_atomic(prom_path, self.to_prometheus())
+        return json_path, prom_path
+
+def load_metrics(config):
+    """
+    Build a RequestMetrics from the global 'metrics' config section.
+    Parameters:
+        config (Config): The loaded config.
+    Returns:
+        RequestMetrics: The metrics, or None if exporting metrics is not enabled.
+    """
+    metrics_data = config.metrics_data
+    if not metrics_data or not metrics_data.get('enabled', False):
+        return None
+    return RequestMetrics()
+
+def export_metrics(metrics, config, script_name, logger):
+    """
+    Export the metrics for a run to the directory set in the global 'metrics' config section.
+    Parameters:
+        metrics (RequestMetrics): The metrics to export, nothing is done if None.
+        config (Config): The loaded config.
+        script_name (str): The name of the script.
+        logger (logging.Logger): a logger object for logging debug messages.
+    """
+    if not metrics:
+        return
+    directory = config.metrics_data.get('path') or f'{base_dir}/logs'
+    try:
+        json_path, prom_path = metrics.export(directory, script_name)
+        logger.debug(f"Request metrics written to {json_path} and {prom_path}")
+    except OSError as e:
+        logger.error(f"Unable to write request metrics to {directory}: {e}")
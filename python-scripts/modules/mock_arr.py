@@ -0,0 +1,618 @@
+#   __  __            _
+#  |  \/  |          | |        /\
+#  | \  / | ___   ___| | __    /  \   _ __ _ __
+#  | |\/| |/ _ \ / __| |/ /   / /\ \ | '__| '__|
+#  | |  | | (_) | (__|   <   / ____ \| |  | |
+#  |_|  |_|\___/ \___|_|\_\ /_/    \_\_|  |_|
+# ===================================================================================================
+# Description: A local stand-in for the Radarr/Sonarr /api/v3 endpoints used by arrpy.py, serving a
+#              synthetic library of configurable size with configurable per-request latency.
+#              Point a script's radarr/sonarr url at it to load-test the script without touching a real instance.
+# Usage: python3 -m modules.mock_arr --type radarr --movies 100000 --latency 0.02
+#        python3 -m modules.mock_arr --type sonarr --series 5000 --episodes 300000 --port 8989
+# Requirements: None
+# License: MIT License
+# ===================================================================================================
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+title_words = [
+    "Shadow", "Night", "Empire", "Love", "War", "Dream", "City", "Star", "Ghost", "River", "Fire", "Iron", "Silent",
+    "Last", "Lost", "Golden", "Dark", "Broken", "Wild", "Secret", "Crimson", "Frozen", "Hidden", "Midnight", "Eternal",
+    "Storm", "Garden", "Kingdom", "Hunter", "Machine", "Island", "Ocean", "Winter", "Summer", "Road", "House", "Mirror",
+    "Dragon", "Thunder", "Echo", "Legacy", "Journey", "Stranger", "Paradise", "Revenge", "Memory", "Horizon", "Blood",
+    "Café", "Señor", "Amélie", "Über", "Noël", "Fête", "Møller", "Ørsted", "Zoë", "Björk", "Ça",
+]
+title_joiners = ["of the", "and the", "in the", "Beyond the", "Under the", "from the", "&"]
+title_sequels = ["2", "3", "II", "III", "Part 2", "Returns", "Reloaded", "Origins"]
+subtitle_words = ["The Beginning", "Resurrection", "A New Hope", "The Final Chapter", "Redemption", "Rise", "Fall", "Dawn"]
+series_statuses = ["continuing", "ended", "upcoming"]
+movie_statuses = ["released", "released", "released", "inCinemas", "announced"]
+queue_messages = [
+    "Not an upgrade for existing movie file(s)",
+    "Not an upgrade for existing episode file(s)",
+    "Not a Custom Format upgrade for existing movie file(s)",
+    "New Quality is BR-DISK",
+    "No files found are eligible for import in",
+    "The download is missing files",
+]
+quality_profile_names = ["Any", "SD", "HD-720p", "HD-1080p", "Ultra-HD", "HD - 720p/1080p", "Remux-1080p", "Remux-2160p"]
+
+def make_title(rng):
+    """
+    Build a realistic looking title.
+    Parameters:
+        rng (random.Random): The random generator to use.
+    Returns:
+        str: The title.
+    """
+    shape = rng.random()
+    if shape < 0.35:
+        title = f"{rng.choice(title_words)} {rng.choice(title_words)}"
+    elif shape < 0.6:
+        title = f"The {rng.choice(title_words)} {rng.choice(title_joiners)} {rng.choice(title_words)}"
+    elif shape < 0.75:
+        title = f"{rng.choice(title_words)}: {rng.choice(subtitle_words)}"
+    elif shape < 0.85:
+        title = f"{rng.choice(title_words)} {rng.choice(title_words)} {rng.choice(title_sequels)}"
+    elif shape < 0.92:
+        title = f"{rng.choice(title_words)}'s {rng.choice(title_words)}"
+    else:
+        title = rng.choice(title_words)
+    return title
+
+def sort_title(title):
+    title = title.lower()
+    for article in ("the ", "a ", "an "):
+        if title.startswith(article):
+            return title[len(article):]
+    return title
+
+def iso_date(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class SyntheticLibrary:
+    def __init__(self, instance_type, movies=1000, series=200, episodes=12000, tags=20, queue=50, seed=0):
+        """
+        Initialize the SyntheticLibrary class.
+        The same seed always generates the same library. Sonarr episodes are not kept in memory,
+        they are regenerated from the seed when a series' episodes are requested.
+        Parameters:
+            instance_type (str): 'Radarr' or 'Sonarr'.
+            movies (int): The number of movies to generate for Radarr.
+            series (int): The number of series to generate for Sonarr.
+            episodes (int): The total number of episodes to spread over the series.
+            tags (int): The number of tags to generate.
+            queue (int): The number of queue records to generate.
+            seed (int): The seed for the random generator.
+        """
+        self.instance_type = instance_type
+        self.seed = seed
+        self.lock = threading.RLock()
+        self.version = 0
+        rng = random.Random(seed)
+        self.tags = [{"id": i, "label": f"tag-{i}"} for i in range(1, tags + 1)]
+        self.quality_profiles = [{"id": i, "name": name} for i, name in enumerate(quality_profile_names, start=1)]
+        self.deleted_files = set()
+        self.commands = {}
+        self.next_command_id = 1
+        self.history = []
+        self.items = {}
+        if instance_type == 'Radarr':
+            for media_id in range(1, movies + 1):
+                self.items[media_id] = self.make_movie(rng, media_id)
+        else:
+            per_series = max(1, episodes // max(1, series))
+            next_episode_id = 1
+            for media_id in range(1, series + 1):
+                item = self.make_series(rng, media_id, per_series, next_episode_id)
+                next_episode_id += sum(item["_seasonSizes"])
+                self.items[media_id] = item
+        self.queue = [self.make_queue_record(rng, i) for i in range(1, queue + 1)]
+
+    def common_fields(self, rng, media_id, folder_root):
+        title = make_title(rng)
+        year = rng.randint(1930, 2024)
+        alternate_titles = []
+        for _ in range(rng.choice([0, 0, 0, 1, 1, 2, 3])):
+            alternate_titles.append({"title": make_title(rng), "sourceType": "tmdb"})
+        return {
+            "id": media_id,
+            "title": title,
+            "originalTitle": title if rng.random() < 0.8 else make_title(rng),
+            "sortTitle": sort_title(title),
+            "alternateTitles": alternate_titles,
+            "year": year,
+            "secondaryYear": year + 1 if rng.random() < 0.05 else None,
+            "path": f"{folder_root}/{title} ({year})",
+            "folderName": f"{title} ({year})",
+            "monitored": rng.random() < 0.85,
+            "qualityProfileId": rng.choice(self.quality_profiles)["id"],
+            "tags": sorted(rng.sample([tag["id"] for tag in self.tags], k=min(len(self.tags), rng.choice([0, 0, 1, 1, 2, 3])))),
+            "added": iso_date(1500000000 + media_id * 3600),
+            "images": [
+                {"coverType": "poster", "url": f"/MediaCover/{media_id}/poster.jpg"},
+                {"coverType": "fanart", "url": f"/MediaCover/{media_id}/fanart.jpg"},
+            ],
+            "genres": rng.sample(["Action", "Drama", "Comedy", "Horror", "Documentary", "Animation", "Thriller"], k=2),
+            "overview": " ".join(rng.choice(title_words).lower() for _ in range(40)),
+        }
+
+    def make_movie(self, rng, media_id):
+        movie = self.common_fields(rng, media_id, "/data/media/movies")
+        movie["status"] = rng.choice(movie_statuses)
+        movie["tmdbId"] = 10000 + media_id
+        movie["imdbId"] = f"tt{1000000 + media_id}"
+        movie["hasFile"] = rng.random() < 0.9
+        movie["sizeOnDisk"] = rng.randint(700, 60000) * 1024 * 1024 if movie["hasFile"] else 0
+        if movie["hasFile"]:
+            movie["movieFile"] = {
+                "id": media_id,
+                "movieId": media_id,
+                "relativePath": f"{movie['folderName']}.mkv",
+                "path": f"{movie['path']}/{movie['folderName']}.mkv",
+                "size": movie["sizeOnDisk"],
+                "quality": {"quality": {"name": rng.choice(["Bluray-1080p", "WEBDL-1080p", "Bluray-2160p", "HDTV-720p"])}},
+            }
+        return movie
+
+    def make_series(self, rng, media_id, per_series, first_episode_id):
+        series = self.common_fields(rng, media_id, "/data/media/tv")
+        series["status"] = rng.choice(series_statuses)
+        series["tvdbId"] = 70000 + media_id
+        total = max(1, int(rng.gauss(per_series, per_series / 3)))
+        season_count = max(1, min(total, rng.randint(1, max(1, total // 8))))
+        sizes = [total // season_count] * season_count
+        sizes[-1] += total - sum(sizes)
+        series["_seasonSizes"] = sizes
+        series["_firstEpisodeId"] = first_episode_id
+        return series
+
+    def make_queue_record(self, rng, queue_id):
+        item = self.items[rng.randint(1, len(self.items))] if self.items else {"id": 0, "title": make_title(rng)}
+        messages = []
+        if rng.random() < 0.5:
+            messages = [{"title": item["title"], "messages": [rng.choice(queue_messages)]}]
+        record = {
+            "id": queue_id,
+            "title": f"{item['title']}.{item.get('year', 2000)}.1080p.WEB-DL.x264-GROUP",
+            "status": rng.choice(["downloading", "completed", "queued"]),
+            "trackedDownloadStatus": "warning" if messages else "ok",
+            "statusMessages": messages,
+            "downloadId": f"{queue_id:040x}",
+        }
+        if self.instance_type == 'Radarr':
+            record["movieId"] = item["id"]
+        else:
+            record["seriesId"] = item["id"]
+        return record
+
+    def public(self, item):
+        """
+        Strip the generator's private fields and fill in the live series statistics.
+        """
+        item = {key: value for key, value in item.items() if not key.startswith("_")}
+        if self.instance_type == 'Sonarr':
+            episodes = self.episodes(item["id"])
+            seasons = []
+            for season_number in sorted({episode["seasonNumber"] for episode in episodes}):
+                season_episodes = [episode for episode in episodes if episode["seasonNumber"] == season_number]
+                file_count = sum(1 for episode in season_episodes if episode["hasFile"])
+                seasons.append({
+                    "seasonNumber": season_number,
+                    "monitored": item["monitored"],
+                    "statistics": {
+                        "episodeFileCount": file_count,
+                        "episodeCount": len(season_episodes),
+                        "totalEpisodeCount": len(season_episodes),
+                        "sizeOnDisk": file_count * 1500 * 1024 * 1024,
+                        "percentOfEpisodes": round(100.0 * file_count / len(season_episodes), 1),
+                    },
+                })
+            item["seasons"] = seasons
+            item["statistics"] = {
+                "seasonCount": len(seasons),
+                "episodeFileCount": sum(season["statistics"]["episodeFileCount"] for season in seasons),
+                "episodeCount": len(episodes),
+                "totalEpisodeCount": len(episodes),
+                "sizeOnDisk": sum(season["statistics"]["sizeOnDisk"] for season in seasons),
+            }
+        return item
+
+    def episodes(self, series_id):
+        """
+        Generate the episodes of a series.
+        Parameters:
+            series_id (int): The ID of the series.
+        Returns:
+            list: The episodes, episode files that were deleted are reported as missing.
+        """
+        series = self.items.get(series_id)
+        if series is None or self.instance_type != 'Sonarr':
+            return []
+        rng = random.Random(self.seed * 1000003 + series_id)
+        episodes = []
+        episode_id = series["_firstEpisodeId"]
+        for season_number, size in enumerate(series["_seasonSizes"], start=1):
+            for episode_number in range(1, size + 1):
+                has_file = rng.random() < 0.9 and episode_id not in self.deleted_files
+                episodes.append({
+                    "id": episode_id,
+                    "seriesId": series_id,
+                    "seasonNumber": season_number,
+                    "episodeNumber": episode_number,
+                    "title": make_title(rng),
+                    "airDateUtc": iso_date(1000000000 + episode_id * 86400),
+                    "hasFile": has_file,
+                    "episodeFileId": episode_id if has_file else 0,
+                    "monitored": series["monitored"] and rng.random() < 0.95,
+                })
+                episode_id += 1
+        return episodes
+
+    def changed(self):
+        self.version += 1
+
+    def add_history(self, event_type, media_id, episode_id=None):
+        """
+        Record a history event, as the real instances do for file changes.
+        """
+        record = {"id": len(self.history) + 1, "eventType": event_type, "date": iso_date(time.time()), "_time": time.time()}
+        if self.instance_type == 'Radarr':
+            record["movieId"] = media_id
+        else:
+            record["seriesId"] = media_id
+            record["episodeId"] = episode_id
+        self.history.append(record)
+
+    def series_of_episode(self, episode_id):
+        for item in self.items.values():
+            if item["_firstEpisodeId"] <= episode_id < item["_firstEpisodeId"] + sum(item["_seasonSizes"]):
+                return item["id"]
+        return None
+
+class MockArrHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, obj, status=200):
+        body = obj if isinstance(obj, bytes) else json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def handle_request(self, method):
+        server = self.server.mock
+        server.wait()
+        if server.api_key and self.headers.get("X-Api-Key") != server.api_key:
+            self.read_json()
+            return self.send_json({"error": "Unauthorized"}, 401)
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/")
+        if not path.startswith("/api/v3/"):
+            self.read_json()
+            return self.send_json({"message": "NotFound"}, 404)
+        segments = path[len("/api/v3/"):].split("/")
+        body = self.read_json() if method in ("POST", "PUT", "DELETE") else None
+        with server.library.lock:
+            server.count(method, segments)
+            result = server.route(method, segments, query, body)
+        if result is None:
+            return self.send_json({"message": "NotFound"}, 404)
+        status, obj = result
+        self.send_json(obj, status)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PUT(self):
+        self.handle_request("PUT")
+
+    def do_DELETE(self):
+        self.handle_request("DELETE")
+
+class MockArrServer:
+    def __init__(self, library, host="127.0.0.1", port=0, latency=0, jitter=0, command_duration=1, api_key=None):
+        """
+        Initialize the MockArrServer class.
+        Parameters:
+            library (SyntheticLibrary): The library to serve.
+            host (str): The address to listen on.
+            port (int): The port to listen on, 0 picks a free port.
+            latency (float): Seconds to wait before answering each request.
+            jitter (float): Up to this many extra seconds are added to the latency at random.
+            command_duration (float): Seconds before a command is reported as completed.
+            api_key (str): Reject requests without this X-Api-Key, None accepts any key.
+        """
+        self.library = library
+        self.latency = latency
+        self.jitter = jitter
+        self.command_duration = command_duration
+        self.api_key = api_key
+        self.requests = {}
+        self.list_cache = (None, None)
+        self.httpd = ThreadingHTTPServer((host, port), MockArrHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+        Returns:
+            str: The URL of the server.
+        """
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def wait(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def count(self, method, segments):
+        key = f"{method} /api/v3/{'/'.join('{id}' if segment.isdigit() else segment for segment in segments)}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def media_list(self):
+        # Serializing 100k movies is slow, keep the encoded list until the library changes
+        version, body = self.list_cache
+        if version != self.library.version:
+            items = [self.library.public(item) for item in self.library.items.values()]
+            body = json.dumps(items).encode("utf-8")
+            self.list_cache = (self.library.version, body)
+        return body
+
+    def command_status(self, command):
+        elapsed = time.time() - command["_queued"]
+        if elapsed >= self.command_duration:
+            command["status"] = "completed"
+            command["ended"] = iso_date(command["_queued"] + self.command_duration)
+        elif elapsed > 0:
+            command["status"] = "started"
+        return {key: value for key, value in command.items() if not key.startswith("_")}
+
+    def route(self, method, segments, query, body):
+        """
+        Answer a request.
+        Parameters:
+            method (str): The HTTP method.
+            segments (list): The path below /api/v3, split on '/'.
+            query (dict): The query parameters.
+            body: The decoded JSON body.
+        Returns:
+            tuple: (status, object or encoded bytes), None if the endpoint is not known.
+        """
+        library = self.library
+        media = "movie" if library.instance_type == 'Radarr' else "series"
+        resource = segments[0]
+        item_id = int(segments[1]) if len(segments) > 1 and segments[1].isdigit() else None
+
+        if resource == "system" and segments[1:] == ["status"]:
+            return 200, {"appName": library.instance_type, "instanceName": f"Mock {library.instance_type}", "version": "5.0.0.0"}
+        if resource == "health":
+            return 200, []
+        if resource == media:
+            if len(segments) == 2 and segments[1] == "editor" and method == "PUT":
+                ids = set(body.get("movieIds") or body.get("seriesIds") or [])
+                tags = set(body.get("tags", []))
+                apply_tags = body.get("applyTags", "add")
+                updated = []
+                for media_id in ids:
+                    item = library.items.get(media_id)
+                    if item is None:
+                        continue
+                    if apply_tags == "add":
+                        item["tags"] = sorted(set(item["tags"]) | tags)
+                    elif apply_tags == "remove":
+                        item["tags"] = sorted(set(item["tags"]) - tags)
+                    else:
+                        item["tags"] = sorted(tags)
+                    updated.append(library.public(item))
+                library.changed()
+                return 202, updated
+            if item_id is None and method == "GET":
+                return 200, self.media_list()
+            item = library.items.get(item_id)
+            if item is None:
+                return 404, {"message": "NotFound"}
+            if method == "GET":
+                return 200, library.public(item)
+            if method == "DELETE":
+                del library.items[item_id]
+                library.changed()
+                return 200, {}
+        if resource == "episode" and method == "GET":
+            return 200, library.episodes(int(query.get("seriesId", 0)))
+        if resource == "episodefile":
+            if segments[1:] == ["bulk"] and method == "DELETE":
+                file_ids = (body or {}).get("episodeFileIds", [])
+            elif item_id is not None and method == "DELETE":
+                file_ids = [item_id]
+            else:
+                file_ids = None
+            if file_ids is not None:
+                for file_id in file_ids:
+                    library.deleted_files.add(file_id)
+                    library.add_history("episodeFileDeleted", library.series_of_episode(file_id), file_id)
+                library.changed()
+                return 200, {}
+            if method == "GET":
+                return 200, [
+                    {"id": episode["episodeFileId"], "seriesId": episode["seriesId"], "seasonNumber": episode["seasonNumber"]}
+                    for episode in library.episodes(int(query.get("seriesId", 0))) if episode["hasFile"]
+                ]
+        if resource == "moviefile":
+            if segments[1:] == ["bulk"] and method == "DELETE":
+                file_ids = (body or {}).get("movieFileIds", [])
+            elif item_id is not None and method == "DELETE":
+                file_ids = [item_id]
+            else:
+                file_ids = None
+            if file_ids is not None:
+                for file_id in file_ids:
+                    movie = library.items.get(file_id)
+                    if movie and movie.get("movieFile"):
+                        del movie["movieFile"]
+                        movie["hasFile"] = False
+                        movie["sizeOnDisk"] = 0
+                        library.add_history("movieFileDeleted", file_id)
+                library.changed()
+                return 200, {}
+            if method == "GET":
+                movie_ids = [item_id] if item_id is not None else [int(value) for value in query.get("movieId", "").split(",") if value]
+                files = [library.items[movie_id]["movieFile"] for movie_id in movie_ids if library.items.get(movie_id, {}).get("movieFile")]
+                return 200, files[0] if item_id is not None and files else files
+        if resource == "tag":
+            if method == "GET":
+                return 200, library.tags
+            if method == "POST":
+                label = str((body or {}).get("label", "")).lower()
+                for tag in library.tags:
+                    if tag["label"] == label:
+                        return 201, tag
+                tag = {"id": max([tag["id"] for tag in library.tags] or [0]) + 1, "label": label}
+                library.tags.append(tag)
+                return 201, tag
+        if resource == "history" and segments[1:] == ["since"] and method == "GET":
+            since = datetime.strptime(query.get("date", "1970-01-01T00:00:00Z")[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+            return 200, [
+                {key: value for key, value in record.items() if not key.startswith("_")}
+                for record in library.history if record["_time"] >= since
+            ]
+        if resource == "qualityprofile" and method == "GET":
+            return 200, library.quality_profiles
+        if resource == "queue":
+            if item_id is not None and method == "DELETE":
+                library.queue = [record for record in library.queue if record["id"] != item_id]
+                return 200, {}
+            if method == "GET":
+                page = max(1, int(query.get("page", 1)))
+                page_size = max(1, int(query.get("pageSize", 10)))
+                start = (page - 1) * page_size
+                return 200, {
+                    "page": page,
+                    "pageSize": page_size,
+                    "totalRecords": len(library.queue),
+                    "records": library.queue[start:start + page_size],
+                }
+        if resource == "rename" and method == "GET":
+            media_id = int(query.get("movieId") or query.get("seriesId") or 0)
+            item = library.items.get(media_id)
+            # About one in five items has files that would be renamed
+            if item is None or random.Random(library.seed + media_id).random() >= 0.2:
+                return 200, []
+            if library.instance_type == 'Radarr':
+                if not item.get("movieFile"):
+                    return 200, []
+                return 200, [{
+                    "movieId": media_id,
+                    "movieFileId": item["movieFile"]["id"],
+                    "existingPath": item["movieFile"]["relativePath"],
+                    "newPath": f"{item['title']} ({item['year']}) [Bluray-1080p].mkv",
+                }]
+            return 200, [
+                {
+                    "seriesId": media_id,
+                    "seasonNumber": episode["seasonNumber"],
+                    "episodeNumbers": [episode["episodeNumber"]],
+                    "episodeFileId": episode["episodeFileId"],
+                    "existingPath": f"Season {episode['seasonNumber']}/{episode['title']}.mkv",
+                    "newPath": f"Season {episode['seasonNumber']:02}/{item['title']} - S{episode['seasonNumber']:02}E{episode['episodeNumber']:02} - {episode['title']}.mkv",
+                }
+                for episode in library.episodes(media_id) if episode["hasFile"]
+            ]
+        if resource == "command":
+            if method == "POST":
+                command_id = library.next_command_id
+                library.next_command_id += 1
+                now = time.time()
+                command = {
+                    "id": command_id,
+                    "name": (body or {}).get("name"),
+                    "commandName": (body or {}).get("name"),
+                    "body": body,
+                    "status": "queued",
+                    "queued": iso_date(now),
+                    "_queued": now,
+                }
+                library.commands[command_id] = command
+                if command["name"] in ("RenameMovie", "RenameSeries", "RefreshMovie", "RefreshSeries"):
+                    library.changed()
+                return 201, self.command_status(command)
+            if method == "GET":
+                if item_id is not None:
+                    command = library.commands.get(item_id)
+                    return (200, self.command_status(command)) if command else (404, {"message": "NotFound"})
+                # Like the real API only recent commands are listed
+                cutoff = time.time() - max(60, self.command_duration * 5)
+                return 200, [self.command_status(command) for command in library.commands.values() if command["_queued"] >= cutoff]
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Radarr/Sonarr library for load-testing the scripts.")
+    parser.add_argument("--type", choices=["radarr", "sonarr"], default="radarr", help="The instance type to mock.")
+    parser.add_argument("--movies", type=int, default=1000, help="Number of movies (radarr).")
+    parser.add_argument("--series", type=int, default=200, help="Number of series (sonarr).")
+    parser.add_argument("--episodes", type=int, default=12000, help="Total number of episodes (sonarr).")
+    parser.add_argument("--tags", type=int, default=20, help="Number of tags.")
+    parser.add_argument("--queue", type=int, default=50, help="Number of queue records.")
+    parser.add_argument("--latency", type=float, default=0, help="Seconds to wait before answering each request.")
+    parser.add_argument("--jitter", type=float, default=0, help="Up to this many extra seconds of random latency.")
+    parser.add_argument("--command-duration", type=float, default=1, help="Seconds before commands complete.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the library generator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Defaults to 7878 for radarr and 8989 for sonarr.")
+    parser.add_argument("--api-key", default=None, help="Only accept requests with this API key.")
+    args = parser.parse_args()
+    instance_type = 'Radarr' if args.type == "radarr" else 'Sonarr'
+    port = args.port if args.port is not None else (7878 if instance_type == 'Radarr' else 8989)
+    start_time = time.monotonic()
+    library = SyntheticLibrary(instance_type, movies=args.movies, series=args.series, episodes=args.episodes,
+                               tags=args.tags, queue=args.queue, seed=args.seed)
+    print(f"Generated {len(library.items)} {'movies' if instance_type == 'Radarr' else 'series'} in {time.monotonic() - start_time:.1f}s")
+    server = MockArrServer(library, host=args.host, port=port, latency=args.latency, jitter=args.jitter,
+                           command_duration=args.command_duration, api_key=args.api_key)
+    print(f"Mock {instance_type} listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        for key, count in sorted(server.requests.items()):
+            print(f"{count:>8} {key}")
+
+if __name__ == "__main__":
+    main()
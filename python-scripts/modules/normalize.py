@@ -0,0 +1,140 @@
+import os
+import re
+import html
+import json
+import atexit
+import pathlib
+import threading
+from functools import lru_cache
+from unidecode import unidecode
+
+base_dir = pathlib.Path(__file__).parent.parent
+
+# The number of distinct strings each normalizer remembers
+cache_size = 65536
+
+words_to_remove = [
+    "(US)",
+]
+
+year_regex = re.compile(r"\((19|20)\d{2}\)")
+illegal_chars_regex = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+remove_special_chars = re.compile(r'[^a-zA-Z0-9\s]+')
+non_alphanumeric_regex = re.compile(r'[^A-Za-z0-9]+')
+
+class TransliterationCache:
+    def __init__(self, path, logger=None):
+        """
+        Initialize the TransliterationCache class.
+        Keeps the unidecode result of every non-ASCII string on disk so later runs don't transliterate
+        the same titles again. New entries are written when the script exits.
+        Parameters:
+            path (str): The JSON file to keep the transliterations in.
+            logger (logging.Logger): a logger object for logging debug messages.
+        """
+        self.path = path
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.added = 0
+        try:
+            with open(self.path, "r") as file:
+                self.values = json.load(file)
+        except (OSError, ValueError):
+            self.values = {}
+        atexit.register(self.save)
+
+    def get(self, text):
+        value = self.values.get(text)
+        if value is None:
+            value = unidecode(text)
+            with self.lock:
+                self.values[text] = value
+                self.added += 1
+        return value
+
+    def save(self):
+        """
+        Write the transliterations to disk if any were added.
+        """
+        with self.lock:
+            if not self.added:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, "w") as file:
+                    json.dump(self.values, file, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self.added = 0
+            except (OSError, TypeError, ValueError) as e:
+                if self.logger:
+                    self.logger.warning(f"Unable to write transliteration cache {self.path}: {e}")
+
+transliteration_cache = None
+
+@lru_cache(maxsize=cache_size)
+def transliterate(text):
+    """
+    unidecode, remembering the result.
+    Parameters:
+        text (str): The text to transliterate.
+    Returns:
+        str: The text in plain ASCII.
+    """
+    if text.isascii():
+        return text
+    if transliteration_cache:
+        return transliteration_cache.get(text)
+    return unidecode(text)
+
+@lru_cache(maxsize=cache_size)
+def normalize_titles(title):
+    """
+    Normalize a title for matching: drops the year, illegal characters and anything but letters and
+    numbers, transliterates to ASCII, '&' becomes 'and', lower case without spaces.
+    Parameters:
+        title (str): The title to normalize.
+    Returns:
+        str: The normalized title.
+    """
+    normalized_title = title
+    for word in words_to_remove:
+        normalized_title = normalized_title.replace(word, '')
+    normalized_title = year_regex.sub('', normalized_title)
+    normalized_title = illegal_chars_regex.sub('', normalized_title)
+    normalized_title = transliterate(html.unescape(normalized_title))
+    normalized_title = normalized_title.rstrip()
+    normalized_title = normalized_title.replace('&', 'and')
+    normalized_title = remove_special_chars.sub('', normalized_title).lower()
+    normalized_title = normalized_title.replace(' ', '')
+    return normalized_title
+
+@lru_cache(maxsize=cache_size)
+def compact_title(title):
+    """
+    A looser normalization that keeps the year: transliterated, '&' becomes 'and', only letters and
+    numbers, lower case.
+    Parameters:
+        title (str): The title to compact.
+    Returns:
+        str: The compacted title.
+    """
+    return non_alphanumeric_regex.sub('', transliterate(title).replace('&', 'and')).strip().lower()
+
+def load_normalize(config, logger):
+    """
+    Set up the on-disk transliteration cache from the global 'normalize' config section.
+    Parameters:
+        config (Config): The loaded config.
+        logger (logging.Logger): a logger object for logging debug messages.
+    Returns:
+        TransliterationCache: The cache, or None if it is not enabled.
+    """
+    global transliteration_cache
+    normalize_data = config.normalize_data
+    if not normalize_data or not normalize_data.get('cache', False):
+        return None
+    cache_dir = normalize_data.get('path') or f'{base_dir}/cache'
+    transliteration_cache = TransliterationCache(os.path.join(cache_dir, "transliterations.json"), logger=logger)
+    transliterate.cache_clear()
+    return transliteration_cache
@@ -0,0 +1,121 @@
+import time
+import threading
+from contextlib import contextmanager
+
+default_rate_limit = {
+    # 0 means no limit on the rate
+    "reads": {"per_second": 0, "max_in_flight": 8},
+    # Radarr/Sonarr write to SQLite, which only takes one writer at a time
+    "writes": {"per_second": 0, "max_in_flight": 2},
+}
+
+read_methods = ("GET", "HEAD", "OPTIONS")
+
+class RequestBudget:
+    def __init__(self, per_second=0, max_in_flight=0, burst=None):
+        """
+        Initialize the RequestBudget class.
+        A token bucket that refills at per_second and holds up to burst tokens, plus a cap on the
+        number of requests in flight at once.
+        Parameters:
+            per_second (float): The sustained number of requests per second, 0 for no limit.
+            max_in_flight (int): The maximum number of requests at once, 0 for no limit.
+            burst (int): The number of requests that may be sent back to back, defaults to one second's worth.
+        """
+        self.per_second = float(per_second or 0)
+        self.max_in_flight = int(max_in_flight or 0)
+        self.burst = float(burst) if burst else max(1.0, self.per_second)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.in_flight = threading.BoundedSemaphore(self.max_in_flight) if self.max_in_flight > 0 else None
+
+    def take_token(self):
+        """
+        Wait for a token.
+        Returns:
+            float: The seconds spent waiting.
+        """
+        if self.per_second <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.per_second
+            time.sleep(wait)
+            waited += wait
+
+    @contextmanager
+    def acquire(self):
+        """
+        Hold a request slot for the duration of the block.
+        """
+        if self.in_flight:
+            self.in_flight.acquire()
+        try:
+            self.take_token()
+            yield
+        finally:
+            if self.in_flight:
+                self.in_flight.release()
+
+class RateLimiter:
+    def __init__(self, reads=None, writes=None):
+        """
+        Initialize the RateLimiter class.
+        Reads and writes are limited separately so a burst of reads can't starve the commands and
+        mutations, and mutations can't pile up on the instance's database.
+        Parameters:
+            reads (dict): per_second, max_in_flight and burst for GET requests.
+            writes (dict): per_second, max_in_flight and burst for POST, PUT and DELETE requests.
+        """
+        self.reads = RequestBudget(**(reads or {}))
+        self.writes = RequestBudget(**(writes or {}))
+
+    def limit(self, method):
+        """
+        Hold a slot from the budget for the request method.
+        Parameters:
+            method (str): The HTTP method.
+        Returns:
+            contextmanager: Use with a 'with' statement around the request.
+        """
+        return (self.reads if method.upper() in read_methods else self.writes).acquire()
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(config, url):
+    """
+    Get the rate limiter for an instance, one is shared by every StARR object for the same URL.
+    The global 'rate_limit' config section sets the limits for every instance, an instance's own
+    'rate_limit' in the radarr/sonarr section overrides them.
+    Parameters:
+        config (Config): The loaded config.
+        url (str): The URL of the instance.
+    Returns:
+        RateLimiter: The rate limiter.
+    """
+    with rate_limiters_lock:
+        limiter = rate_limiters.get(url)
+        if limiter:
+            return limiter
+        settings = {}
+        instance_settings = {}
+        for instance in (config.radarr_data or []) + (config.sonarr_data or []):
+            if instance.get('url') == url:
+                instance_settings = instance.get('rate_limit') or {}
+                break
+        for budget in ("reads", "writes"):
+            settings[budget] = dict(default_rate_limit[budget])
+            settings[budget].update((config.rate_limit_data or {}).get(budget) or {})
+            settings[budget].update(instance_settings.get(budget) or {})
+        limiter = RateLimiter(reads=settings["reads"], writes=settings["writes"])
+        rate_limiters[url] = limiter
+        return limiter
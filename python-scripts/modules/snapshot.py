@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+import pathlib
+import threading
+
+base_dir = pathlib.Path(__file__).parent.parent
+
+def digest(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+class MediaSnapshot:
+    def __init__(self, snapshot_dir, full_resync=86400, logger=None):
+        """
+        Initialize the MediaSnapshot class.
+        Keeps a copy of each instance's movie/series list on disk between runs so it can be brought
+        up to date with the changes since the last run instead of being downloaded again.
+        Parameters:
+            snapshot_dir (str): The directory to store the snapshots in.
+            full_resync (int): Seconds after which the whole list is downloaded again, catching changes the history doesn't show.
+            logger (logging.Logger): a logger object for logging debug messages.
+        """
+        self.snapshot_dir = snapshot_dir
+        self.full_resync = full_resync
+        self.logger = logger
+        self.lock = threading.Lock()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    def file_path(self, scope, name, suffix=""):
+        return os.path.join(self.snapshot_dir, f"{digest(scope)[:12]}_{name}_snapshot{suffix}.json")
+
+    def read(self, path):
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, path, value):
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                json.dump(value, file)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            if self.logger:
+                self.logger.warning(f"Unable to write snapshot file {path}: {e}")
+
+    def load(self, scope, name):
+        """
+        Load the snapshot of an instance.
+        Parameters:
+            scope (str): The instance the snapshot belongs to (eg. the instance URL).
+            name (str): The media endpoint, 'movie' or 'series'.
+        Returns:
+            dict: {"synced": epoch seconds of the last sync, "full_synced": epoch seconds of the last full download,
+                   "items": list of media objects}, or None if there is no snapshot.
+        """
+        with self.lock:
+            state = self.read(self.file_path(scope, name))
+        if not state or not isinstance(state.get("items"), list):
+            return None
+        return state
+
+    def save(self, scope, name, state):
+        """
+        Save the snapshot of an instance.
+        Parameters:
+            scope (str): The instance the snapshot belongs to (eg. the instance URL).
+            name (str): The media endpoint, 'movie' or 'series'.
+            state (dict): The snapshot, see load().
+        """
+        with self.lock:
+            self.write(self.file_path(scope, name), state)
+
+    def needs_full_resync(self, state):
+        """
+        Check if the snapshot is too old to be synced incrementally.
+        Parameters:
+            state (dict): The snapshot, see load().
+        Returns:
+            bool: True if the whole list should be downloaded again.
+        """
+        return state is None or time.time() - state.get("full_synced", 0) >= self.full_resync
+
+    def mark_dirty(self, scope, name, ids):
+        """
+        Record media changed by the scripts themselves so the next sync fetches them again.
+        These are kept in a small side file so the snapshot doesn't have to be rewritten after every change.
+        Parameters:
+            scope (str): The instance the snapshot belongs to (eg. the instance URL).
+            name (str): The media endpoint, 'movie' or 'series'.
+            ids (list): The IDs of the changed media.
+        """
+        if not ids:
+            return
+        path = self.file_path(scope, name, "_dirty")
+        with self.lock:
+            dirty = set(self.read(path) or [])
+            dirty.update(ids)
+            self.write(path, sorted(dirty))
+
+    def dirty_ids(self, scope, name):
+        """
+        Get the media changed by the scripts since the last sync.
+        Parameters:
+            scope (str): The instance the snapshot belongs to (eg. the instance URL).
+            name (str): The media endpoint, 'movie' or 'series'.
+        Returns:
+            set: The IDs of the changed media.
+        """
+        with self.lock:
+            return set(self.read(self.file_path(scope, name, "_dirty")) or [])
+
+    def clear_dirty(self, scope, name):
+        """
+        Forget the changed media once the snapshot has been saved with them.
+        """
+        with self.lock:
+            try:
+                os.remove(self.file_path(scope, name, "_dirty"))
+            except OSError:
+                pass
+
+def load_snapshot(config, logger):
+    """
+    Build a MediaSnapshot from the global 'snapshot' config section.
+    Parameters:
+        config (Config): The loaded config.
+        logger (logging.Logger): a logger object for logging debug messages.
+    Returns:
+        MediaSnapshot: The snapshot store, or None if incremental sync is not enabled.
+    """
+    snapshot_data = config.snapshot_data
+    if not snapshot_data or not snapshot_data.get('enabled', False):
+        return None
+    snapshot_dir = snapshot_data.get('path') or f'{base_dir}/cache'
+    full_resync = float(snapshot_data.get('full_resync') or 24) * 3600
+    return MediaSnapshot(snapshot_dir, full_resync=full_resync, logger=logger)
@@ -18,7 +18,13 @@ script_version = "1.0.1"
 
 from modules.config import Config
 from modules.logger import setup_logger
-from modules.arrpy import StARR
+from modules.arrpy import StARR, StARRError
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.ratelimit import get_rate_limiter
+from modules.deadline import load_deadline
+from modules.snapshot import load_snapshot
+from modules.cache import load_cache
 from modules.arrpy import arrpy_py_version
 import json
 import re
@@ -28,6 +34,11 @@ from modules.discord import discord
 script_name = "movie_deletarr"
 config = Config(script_name)
 logger = setup_logger(config.log_level, script_name)
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, script_name, logger)
+snapshot = load_snapshot(config, logger)
+cache = load_cache(config, logger)
 version(script_name, script_version, arrpy_py_version, logger, config)
 
 
@@ -61,40 +72,46 @@ def main():
             api = instance['api']
             logger.debug(f"url: {url}")
             logger.debug(f"api: {'*' * (len(api) - 5)}{api[-5:]}")
-            app = StARR(url, api, logger)
-            health = app.get_health()
-            media = app.get_media()
-            id_list = []
-            if health:
-                for h in health:
-                    if h['source'] == "RemovedMovieCheck" or h['source'] == "RemoveSeriesCheck":
-                        if instance_type == "Radarr":
-                            for m in re.finditer(tmdb_id_extractor, h['message']):
-                                id_list.append(int(m.group(1)))
-                        if instance_type == "Sonarr":
-                            for m in re.finditer(tvdb_id_extractor, h['message']):
-                                id_list.append(int(m.group(1)))
-            logger.info(f"id_list: {id_list}")
-            dict_list_of_ids = {}
-            for m in media:
-                title = m['title']
-                id = m['id']
-                if instance_type == "Sonarr":
-                    media_id = m['tvdbId']
-                    id_type = "tvdbId"
-                if instance_type == "Radarr":
-                    media_id = m['tmdbId']
-                    id_type = "tmdbId"
-                if media_id in id_list:
-                    logger.info(f"Found {title} with {id_type}: {media_id}")
-                    dict_list_of_ids[title] = id
-            logger.debug(f"dict_list_of_ids: {json.dumps(dict_list_of_ids, indent=4)}")
-            for title, id in dict_list_of_ids.items():
-                if not dry_run:
-                    logger.info(f"{title} deleted with id: {id}")
-                    app.delete_media(id, instance_type)
-                else:
-                    logger.info(f"{title} would have been deleted with id: {id}")
+            try:
+                app = StARR(url, api, logger, cache=cache, instance_type=instance_type, metrics=metrics, fixtures=fixtures, snapshot=snapshot, rate_limiter=get_rate_limiter(config, url), deadline=deadline)
+                health = app.get_health()
+                media = app.get_media()
+                id_list = []
+                if health:
+                    for h in health:
+                        if h['source'] == "RemovedMovieCheck" or h['source'] == "RemoveSeriesCheck":
+                            if instance_type == "Radarr":
+                                for m in re.finditer(tmdb_id_extractor, h['message']):
+                                    id_list.append(int(m.group(1)))
+                            if instance_type == "Sonarr":
+                                for m in re.finditer(tvdb_id_extractor, h['message']):
+                                    id_list.append(int(m.group(1)))
+                logger.info(f"id_list: {id_list}")
+                dict_list_of_ids = {}
+                for m in media:
+                    title = m['title']
+                    id = m['id']
+                    if instance_type == "Sonarr":
+                        media_id = m['tvdbId']
+                        id_type = "tvdbId"
+                    if instance_type == "Radarr":
+                        media_id = m['tmdbId']
+                        id_type = "tmdbId"
+                    if media_id in id_list:
+                        logger.info(f"Found {title} with {id_type}: {media_id}")
+                        dict_list_of_ids[title] = id
+                logger.debug(f"dict_list_of_ids: {json.dumps(dict_list_of_ids, indent=4)}")
+                for title, id in dict_list_of_ids.items():
+                    if not dry_run:
+                        logger.info(f"{title} deleted with id: {id}")
+                        app.delete_media(id, instance_type)
+                    else:
+                        logger.info(f"{title} would have been deleted with id: {id}")
+            except StARRError as e:
+                logger.error(f"Skipping {url}: {e}")
+    if cache:
+        cache.log_stats()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
+    export_metrics(metrics, config, script_name, logger)
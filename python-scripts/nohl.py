@@ -26,8 +26,14 @@ import json
 import re
 from modules.config import Config
 from modules.logger import setup_logger
-from modules.arrpy import StARR
-from unidecode import unidecode
+from modules.arrpy import StARR, StARRError, default_media_fields
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.ratelimit import get_rate_limiter
+from modules.deadline import load_deadline
+from modules.snapshot import load_snapshot
+from modules.cache import load_cache
+from modules.normalize import load_normalize, transliterate
 from modules.arrpy import arrpy_py_version
 from modules.version import version
 from modules.discord import discord
@@ -37,12 +43,19 @@ script_name = "nohl"
 config = Config(script_name)
 log_level = config.log_level
 logger = setup_logger(log_level, script_name)
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, script_name, logger)
+snapshot = load_snapshot(config, logger)
+cache = load_cache(config, logger)
+load_normalize(config, logger)
 version(script_name, script_version, arrpy_py_version, logger, config)
 
 illegal_chars_regex = re.compile(r"[^\w\s\-\(\)/.'’]+")
 season_regex = r"(?i)S(\d{2})E"
 episode_regex = r"(?:E|e)(\d{1,2})"
 title_regex = r".*\/([^/]+)\s\((\d{4})\).*"
+media_fields = default_media_fields + ("movieFile",)
 
 def find_no_hl_files(media_paths):
     no_hl_files = []
@@ -66,8 +79,9 @@ def process_instances(instance_type, url, api, nohl_files, include_profiles, exc
     nohl_files.sort()
     media_data = []
     media_data_episodes = []
-    app = StARR(url, api, logger)
-    media = app.get_media()
+    app = StARR(url, api, logger, cache=cache, instance_type=instance_type, metrics=metrics, fixtures=fixtures, chunk_size=config.chunk_size, chunk_concurrency=config.chunk_concurrency, snapshot=snapshot, rate_limiter=get_rate_limiter(config, url), deadline=deadline)
+    # Seasons and their statistics are only fetched for the series that have files to process
+    media = app.get_media(fields=media_fields)
     title = None
     year = None
     season_number = None
@@ -141,14 +155,14 @@ def process_instances(instance_type, url, api, nohl_files, include_profiles, exc
     quality_profiles = app.get_quality_profile_names()
     for media_data_item in media_data:
         media_data_item_title = media_data_item['title']
-        media_data_item_title_modified = unidecode(media_data_item['title'])
+        media_data_item_title_modified = transliterate(media_data_item['title'])
         media_data_item_title_modified = illegal_chars_regex.sub("", media_data_item_title_modified)
         media_data_item_year = media_data_item['year']
         for media_item in media:
             quality_profile_id = None
             quality_profile_name = None
             media_item_title = media_item['title']
-            media_item_title_modified = unidecode(re.sub(r' \(\d+\)', '', (media_item['title'])))
+            media_item_title_modified = transliterate(re.sub(r' \(\d+\)', '', (media_item['title'])))
             media_item_title_modified = illegal_chars_regex.sub("", media_item_title_modified)
             media_item_year = media_item['year']
             media_item_id = media_item['id']
@@ -184,10 +198,10 @@ def process_instances(instance_type, url, api, nohl_files, include_profiles, exc
                     elif instance_type == 'Sonarr':
                         monitored_seasons = []
                         media_data_seasons = [season['season_number'] for season in media_data_item['season_info']]
-                        media_seasons = media_item['seasons']
                         episode_info = []
 
                         if media_item_monitored:
+                            media_seasons = app.get_series_seasons(media_item_id)
                             for s in media_seasons:
                                 season_monitored = s['monitored']
                                 if season_monitored:
@@ -279,6 +293,12 @@ def final_step(app, results, instance_type, dry_run):
     if current_time - last_search_time >= 3600:
         search_count = 0
         last_search_time = current_time
+    # Delete and refresh everything first, then wait for all of the refreshes at once so the
+    # searches don't race Radarr/Sonarr still picking up the deleted files
+    refreshes = []
+    searches_to_send = []
+    movie_file_ids = []
+    movie_ids = []
     for result in results:
         if search_count >= searches:
             logger.warning('Maximum number of searches reached, cannot perform search')
@@ -296,9 +316,8 @@ def final_step(app, results, instance_type, dry_run):
                     logger.debug(f"Processing {instance_type} - Deleting episode file for {title} Season {season_number}, Season Pack: {season_pack}")
                     if not dry_run:
                         app.delete_episode_files(episode_file_id)
-                        app.refresh_media(media_id)
-                        app.search_season(media_id, season_number)
-                        logger.info(f"Deleted Season {season_number} for {title}, and a search request was sent to Sonarr for Season {season_number}")
+                        refreshes.append(app.refresh_media(media_id))
+                        searches_to_send.append((app.search_season, (media_id, season_number), f"Deleted Season {season_number} for {title}, and a search request was sent to Sonarr for Season {season_number}"))
                         search_count += 1
                     else:
                         logger.info(f"Would have deleted Season {season_number} for {title}, and the a search request would have been sent to Sonarr for Season {season_number}")
@@ -309,10 +328,9 @@ def final_step(app, results, instance_type, dry_run):
                     logger.debug(f"Processing {instance_type} - Deleting episode file for {title} Season {season_number}, Season Pack: {season_pack}")
                     if not dry_run:
                         app.delete_episode_files(episode_file_id)
-                        app.refresh_media(media_id)
-                        app.search_episodes(episode_ids)
+                        refreshes.append(app.refresh_media(media_id))
+                        searches_to_send.append((app.search_episodes, (episode_ids,), f"Deleted episode file for {title} Season {season_number} episodes {episode_numbers}, search request sent to Sonarr"))
                         search_count += 1  
-                        logger.info(f"Deleted episode file for {title} Season {season_number} episodes {episode_numbers}, search request sent to Sonarr")
                     else:
                         logger.info(f"Would have deleted episode files for {title} Season {season_number} episodes {episode_numbers}, and the individual episodes would have been searched for a replacement")
                 logger.debug(f"Search counter: {search_count}")
@@ -320,13 +338,22 @@ def final_step(app, results, instance_type, dry_run):
             file_ids = result['file_ids']
             logger.debug(f"Processing {instance_type} - Deleting movie file for {title}")
             if not dry_run:
-                app.delete_movie_file(file_ids)
-                app.refresh_media(media_id)
-                app.search_media(media_id)
-                logger.info(f"Deleted movie file for {title}, and the movie was searched for a replacement")
+                movie_file_ids.append(file_ids)
+                movie_ids.append(media_id)
+                searches_to_send.append((app.search_media, (media_id,), f"Deleted movie file for {title}, and the movie was searched for a replacement"))
                 search_count += 1
             else:
                 logger.info(f"Would have deleted movie file for {title}, and the movie would have been searched for a replacement")   
+    if movie_file_ids:
+        # One bulk delete and one refresh command for every movie instead of a request pair per movie
+        app.delete_movie_file(movie_file_ids)
+        refreshes.append(app.refresh_media(movie_ids))
+    if refreshes:
+        logger.debug(f"Waiting for {len(refreshes)} refresh commands to finish")
+        app.wait_for(refreshes)
+    for search, args, message in searches_to_send:
+        search(*args)
+        logger.info(message)
     logger.debug(f"Search Total: {search_count}")
     try:
         with open(tmp_file_path, 'w') as f:
@@ -467,7 +494,13 @@ def main():
                                     sys.exit()
                                 nohl_files = _instance['files_to_process']
                                 logger.debug(f"Processing {len(nohl_files)} files")
-                        process_instances(instance_type, url, api, nohl_files, include_profiles, exclude_profiles, dry_run, exclude_series)
+                        try:
+                            process_instances(instance_type, url, api, nohl_files, include_profiles, exclude_profiles, dry_run, exclude_series)
+                        except StARRError as e:
+                            logger.error(f"Skipping {instance_name}: {e}")
+    if cache:
+        cache.log_stats()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    export_metrics(metrics, config, script_name, logger)
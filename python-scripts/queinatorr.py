@@ -20,12 +20,19 @@ import json
 from modules.config import Config
 from modules.logger import setup_logger
 from qbittorrentapi import Client
-from modules.arrpy import StARR
+from modules.arrpy import StARR, StARRError
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.ratelimit import get_rate_limiter
+from modules.deadline import load_deadline
 from urllib.parse import urlsplit
 from modules.arrpy import arrpy_py_version
 
 config = Config(script_name="queinatorr")
 logger = setup_logger(config.log_level, "queinatorr")
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, "queinatorr", logger)
 
 queue_list = [
     "Not an upgrade for existing episode file(s)",
@@ -86,12 +93,12 @@ def handle_qbit(title_list, url, username, password, move_category, dry_run, mov
                 logger.info(f"Would move {torrent} from {category} to {move_category}")
     qb.auth_log_out()
 
-def handle_queued_items(queue):
+def handle_queued_items(queue_records):
     logger.debug('*' * 40)
     logger.debug(f'* {"Handling queue items":^36} *')
     logger.debug('*' * 40)
     title_list = []
-    for record in queue['records']:
+    for record in queue_records:
         title = record['title']
         if record['statusMessages']:
             for message in record['statusMessages']:
@@ -149,9 +156,13 @@ def main():
                         api = i['api']
                         logger.debug(f"url: {url}")
                         logger.debug(f"api: {'*' * (len(api) - 5)}{api[-5:]}")
-                        app = StARR(url, api, logger)
-                        queue = app.get_queue()
-                        title_list = handle_queued_items(queue)
+                        app = StARR(url, api, logger, instance_type=app_type, metrics=metrics, fixtures=fixtures, rate_limiter=get_rate_limiter(config, url), deadline=deadline)
+                        try:
+                            queue_records = app.iter_queue(status_messages_only=True)
+                            title_list = handle_queued_items(queue_records)
+                        except StARRError as e:
+                            logger.error(f"Skipping {i['name']}: {e}")
+                            continue
                         for q in config.qbit_data:
                             if q['name'] == item['name']:
                                 url = q['url']
@@ -183,9 +194,13 @@ def main():
                                             logger.debug(f"move_missing: {move_missing}")
                                             logger.debug(f"Move missing for {starr_app} is {move_missing}")
                                 handle_qbit(title_list, url, username, password, move_category, dry_run, move_missing)
-                                app.refresh_queue()
+                                try:
+                                    app.refresh_queue()
+                                except StARRError as e:
+                                    logger.error(f"Unable to refresh the queue of {i['name']}: {e}")
     logger.info("Exiting queinatorr")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
+    export_metrics(metrics, config, "queinatorr", logger)
@@ -20,7 +20,13 @@ script_version = "3.2.3"
 
 from modules.config import Config
 from modules.logger import setup_logger
-from modules.arrpy import StARR
+from modules.arrpy import AsyncStARR, default_media_fields
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.fleet import Fleet
+from modules.deadline import load_deadline
+from modules.snapshot import load_snapshot
+from modules.cache import load_cache
 from modules.arrpy import arrpy_py_version
 from modules.version import version
 from modules.discord import discord
@@ -30,6 +36,11 @@ script_name = "renameinatorr"
 config = Config(script_name)
 log_level = config.log_level
 logger = setup_logger(log_level, script_name)
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, script_name, logger)
+snapshot = load_snapshot(config, logger)
+cache = load_cache(config, logger)
 version(script_name, script_version, arrpy_py_version, logger, config)
 
 def check_all_tagged(all_media, tag_id):
@@ -48,7 +59,7 @@ def check_all_tagged(all_media, tag_id):
             return False
     return True
 
-def print_format(items, instance_type, dry_run, total_count, tagged_percent, untagged_percent, media_type, tagged_count, untagged_count):
+def print_format(items, instance_type, dry_run, total_count, tagged_percent, untagged_percent, media_type, tagged_count, untagged_count, logger=logger):
     """
     Print the format of the output.
     
@@ -63,6 +74,7 @@ def print_format(items, instance_type, dry_run, total_count, tagged_percent, unt
         media_type (str): The type of media to process.
         tagged_count (int): The number of items that have been tagged.
         untagged_count (int): The number of items that have not been tagged.
+        logger (logging.Logger): The logger to print with, defaults to the script's logger.
     """
     if dry_run:
         tagged = "would have been tagged"
@@ -96,11 +108,12 @@ def print_format(items, instance_type, dry_run, total_count, tagged_percent, unt
         untagged_percent = (untagged_count / total_count) * 100
         logger.info(f'Total {media_type}: {total_count}, Tagged {media_type}: {tagged_count} ({tagged_percent:.2f}%), Untagged {media_type}: {untagged_count} ({untagged_percent:.2f}%)\n')
             
-def process_instance(instance_type, instance_name, url, api, tag_name, count, dry_run, reset, unattended):
+def process_instance(app, instance_type, instance_name, url, api, tag_name, count, dry_run, reset, unattended):
     """
     Process the instance based on the instance type.
     
     Args:
+        app (StARR): The StARR object for the instance.
         instance_type (str): The type of instance to process.
         instance_name (str): The name of the instance to process.
         url (str): The URL of the instance to process.
@@ -112,7 +125,7 @@ def process_instance(instance_type, instance_name, url, api, tag_name, count, dr
         unattended (bool): Whether or not to run unattended.
     """
     library_item_to_rename = []
-    app = StARR(url, api, logger)
+    logger = app.logger
     server_name = app.get_instance_name()
     data = [
         [server_name],
@@ -133,7 +146,7 @@ def process_instance(instance_type, instance_name, url, api, tag_name, count, dr
     logger.debug(f'{"Instance Type:":<20}{instance_type if instance_type else "Not Set"}')
     logger.debug(f'{"ARR name:":<20}{server_name if instance_name else "Not Set"}')
     logger.debug('*' * 40 + '\n')
-    media = app.get_media()
+    media = app.get_media(fields=default_media_fields)
     if instance_type == "Radarr":
         media_type = "Movies"
     elif instance_type == "Sonarr":
@@ -191,12 +204,11 @@ def process_instance(instance_type, instance_name, url, api, tag_name, count, dr
         tagged_count = 0
         untagged_count = 0
         new_tag = 0
-        for item in media_to_process:
-            title = item["title"]
-            media_id = item["id"]
-            media_ids.append(media_id)
-            library_item_to_rename = app.get_rename_list(media_id)
-            items[title] = library_item_to_rename
+        media_ids = [item["id"] for item in media_to_process]
+        with AsyncStARR(url, api, logger, concurrency=config.concurrency, app=app) as async_app:
+            rename_lists = async_app.map("get_rename_list", media_ids)
+        for item, library_item_to_rename in zip(media_to_process, rename_lists):
+            items[item["title"]] = library_item_to_rename
         if not dry_run:
             app.rename_media(media_ids)
             app.add_tags(media_ids, arr_tag_id)
@@ -210,7 +222,7 @@ def process_instance(instance_type, instance_name, url, api, tag_name, count, dr
         total_count = (tagged_count + new_tag) + untagged_count
         tagged_percent = ((tagged_count + new_tag) / total_count) * 100
         untagged_percent = (untagged_count / total_count) * 100
-        print_format(items, instance_type.lower(), dry_run, total_count, tagged_percent, untagged_percent, media_type, tagged_count, untagged_count)
+        print_format(items, instance_type.lower(), dry_run, total_count, tagged_percent, untagged_percent, media_type, tagged_count, untagged_count, logger=logger)
 
 # TODO: Add support for parrent folders
 def rename_folder():
@@ -230,38 +242,19 @@ def main():
             ["NO CHANGES WILL BE MADE"]
         ]
         create_table(data, log_level="info", logger=logger)
-    instance_data = {
-        'Radarr': config.radarr_data,
-        'Sonarr': config.sonarr_data
-    }
+    fleet = Fleet(config, logger, cache=cache, metrics=metrics, fixtures=fixtures, snapshot=snapshot, deadline=deadline)
 
-    for instance_type, instances in instance_data.items():
-        for instance in instances:
-            instance_name = instance['name']
-            url = instance['url']
-            api = instance['api']
-            script_name = None
-            if instance_type == "Radarr" and config.radarr:
-                data = next((data for data in config.radarr if data['name'] == instance_name), None)
-                if data:
-                    script_name = data['name']
-                    count = data['count']
-                    tag_name = data['tag_name']
-                    reset = data['reset']
-                    unattended = data['unattended']
-            elif instance_type == "Sonarr" and config.sonarr:
-                data = next((data for data in config.sonarr if data['name'] == instance_name), None)
-                if data:
-                    script_name = data['name']
-                    count = data['count']
-                    tag_name = data['tag_name']
-                    reset = data['reset']
-                    unattended = data['unattended']
-            if script_name and instance_name == script_name:
-                process_instance(instance_type, instance_name, url, api, tag_name, count, config.dry_run, reset, unattended)
+    def run_instance(app, instance):
+        data = instance['settings']
+        process_instance(app, instance['instance_type'], instance['name'], instance['url'], instance['api'], data['tag_name'], data['count'], config.dry_run, data['reset'], data['unattended'])
+
+    fleet.run(run_instance)
+    if cache:
+        cache.log_stats()
 
 if __name__ == "__main__":
     """
     Main entry point for the script.
     """
-    main()
\ No newline at end of file
+    main()
+    export_metrics(metrics, config, script_name, logger)
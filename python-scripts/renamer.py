@@ -10,13 +10,18 @@
 # Author: Drazzilb
 # Description: This script will rename your posters to match Plex-Meta-Manager's naming scheme.
 # Usage: python3 renamer.py 
-# Requirements: requests, tqdm, fuzzywuzzy, pyyaml
+# Requirements: requests, tqdm, rapidfuzz, pyyaml
 # License: MIT License
 # ===================================================================================================
 
 script_version = "6.3.3"
 
 from modules.arrpy import arrpy_py_version
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.ratelimit import get_rate_limiter
+from modules.deadline import load_deadline
+from modules.snapshot import load_snapshot
 from plexapi.exceptions import BadRequest
 from modules.logger import setup_logger
 from plexapi.server import PlexServer
@@ -24,16 +29,16 @@ from modules.version import version
 from modules.formatting import create_table
 from modules.discord import discord, field_builder
 from modules.config import Config
-from modules.arrpy import StARR
-from unidecode import unidecode
-from fuzzywuzzy import process
-from fuzzywuzzy import fuzz
+from modules.arrpy import StARR, StARRError, default_media_fields
+from modules.cache import load_cache
+from modules.normalize import load_normalize, normalize_titles
+from rapidfuzz import process
+from rapidfuzz import fuzz
 from tqdm import tqdm
 import filecmp
 import shutil
 import errno
 import json
-import html
 import sys
 import os
 import re
@@ -42,11 +47,17 @@ script_name = "renamer"
 config = Config(script_name)
 log_level = config.log_level
 logger = setup_logger(log_level, script_name)
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, script_name, logger)
+snapshot = load_snapshot(config, logger)
+cache = load_cache(config, logger)
+load_normalize(config, logger)
 version(script_name, script_version, arrpy_py_version, logger, config)
 
 year_regex = re.compile(r"\((19|20)\d{2}\)")
+asset_year_regex = re.compile(r"\((\d{4})\)")
 illegal_chars_regex = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
-remove_special_chars = re.compile(r'[^a-zA-Z0-9\s]+')
 
 season_name_info = [
     " - Season",
@@ -54,10 +65,6 @@ season_name_info = [
     "_Season"
 ]
 
-words_to_remove = [
-    "(US)",
-]
-
 prefixes = [
     "The",
     "A",
@@ -67,178 +74,218 @@ suffixes = [
     "Collection",
 ]
 
-def find_best_match(matches, title):
+media_fields = default_media_fields + ("originalTitle", "secondaryYear")
+
+# Collection titles are scored without these prefixes/suffixes too. The suffix pattern used for scoring
+# has always had a trailing '*', the one used to check the best match against the assets doesn't.
+prefix_regexes = [re.compile(rf"^{prefix}\s(?=\S)") for prefix in prefixes]
+suffix_score_regexes = [re.compile(rf"\s*{suffix}*") for suffix in suffixes]
+suffix_regexes = [re.compile(rf"\s*{suffix}") for suffix in suffixes]
+non_word_regex = re.compile(r"(?ui)\W")
+
+def fuzzy_process(title):
+    """
+    Clean up a title before scoring: anything but letters and numbers becomes a space, lower case, trimmed.
+    """
+    return non_word_regex.sub(" ", title).lower().strip()
+
+def fuzzy_score(score):
+    return int(round(score))
+
+def index_collections(assets):
+    """
+    Work out every title variant of the collection assets once, so each Plex collection is scored
+    against them without rebuilding them.
+    Parameters:
+        assets (list): The collection assets, as built by get_assets_files.
+    Returns:
+        dict: 'variants': (title type, variant titles, processed variant -> positions) per variant list,
+              in the order they are scored in,
+              'choices': title type -> the distinct processed variants,
+              'titles': title -> position of the first asset the best match can be checked against.
+    """
+    variant_lists = []
+    for key in ("title", "normalized_title"):
+        variant_lists.append((key, [item[key] for item in assets]))
+    for regex in prefix_regexes:
+        for key in ("title", "normalized_title"):
+            variant_lists.append((key, [regex.sub('', item[key]) for item in assets]))
+    for regex in suffix_score_regexes:
+        for key in ("title", "normalized_title"):
+            variant_lists.append((key, [regex.sub('', item[key]) for item in assets]))
+    variants = []
+    choices = {"title": {}, "normalized_title": {}}
+    for key, titles in variant_lists:
+        positions = {}
+        for position, title in enumerate(titles):
+            processed = fuzzy_process(title)
+            choices[key].setdefault(processed, len(choices[key]))
+            positions.setdefault(processed, []).append(position)
+        variants.append((key, titles, positions))
+    titles = {}
+    for position, item in enumerate(assets):
+        checked = [item['title'], item['normalized_title']]
+        for regex in prefix_regexes + suffix_regexes:
+            checked.append(regex.sub('', item['title']))
+            checked.append(regex.sub('', item['normalized_title']))
+        for title in checked:
+            titles.setdefault(title, position)
+    return {
+        "variants": variants,
+        "choices": {key: list(processed) for key, processed in choices.items()},
+        "titles": titles,
+    }
+
+def find_best_match(index, title, normalized_title):
+    """
+    Score a Plex collection against every variant of the collection assets.
+    The highest score wins. Among equal scores, the variant that is exactly the collection title wins,
+    otherwise the first one in the order the variant lists are scored in. Only the first five
+    results of each variant list count.
+    Parameters:
+        index (dict): The collection assets, see index_collections.
+        title (str): The Plex collection title.
+        normalized_title (str): The normalized Plex collection title.
+    Returns:
+        tuple: (matching variant, score), or None if there are no assets.
+    """
+    queries = {"title": fuzzy_process(title), "normalized_title": fuzzy_process(normalized_title)}
+    if not queries["title"] or not queries["normalized_title"]:
+        logger.warning(f"'{title}' is empty once cleaned up for matching, all its scores will be 0")
+    best_scores = {}
+    for key, query in queries.items():
+        best = process.extractOne(query, index['choices'][key], scorer=fuzz.ratio)
+        if best:
+            best_scores[key] = fuzzy_score(best[1])
+    if not best_scores:
+        return None
+    score = max(best_scores.values())
+    tied = {}
+    for key, query in queries.items():
+        if best_scores.get(key) != score:
+            continue
+        results = process.extract(query, index['choices'][key], scorer=fuzz.ratio, limit=None, score_cutoff=max(0, score - 0.5))
+        tied[key] = [choice for choice, choice_score, _ in results if fuzzy_score(choice_score) == score]
     best_match = None
-    for match in matches:
-        for i in match:
-            if best_match:
-                if i[1] > best_match[1]:
-                    best_match = i
-                elif i[1] == best_match[1]:
-                    if i[0] == title:
-                        best_match = i
-            else:
-                best_match = i
+    for key, titles, positions in index['variants']:
+        if key not in tied:
+            continue
+        tied_positions = sorted(position for choice in tied[key] for position in positions.get(choice, ()))[:5]
+        for position in tied_positions:
+            if best_match is None or titles[position] == title:
+                best_match = (titles[position], score)
     return best_match
 
 def match_collection(plex_collections, source_file_list, collection_threshold):
     matched_collections = {"matched_media": []}
     almost_matched = {"almost_matched": []}
     not_matched = {"not_matched": []}
+    index = index_collections(source_file_list['collections'])
     for plex_collection in tqdm(plex_collections, desc="Matching collections", total=len(plex_collections), disable=None):
         plex_normalize_title = normalize_titles(plex_collection)
-        matches = [
-            process.extract(plex_collection, [item['title'] for item in source_file_list['collections']], scorer=fuzz.ratio),
-            process.extract(plex_normalize_title, [item['normalized_title'] for item in source_file_list['collections']], scorer=fuzz.ratio)
-        ]
-        for prefix in prefixes:
-            matches.append(process.extract(plex_collection, [re.sub(rf"^{prefix}\s(?=\S)", '', item['title']) for item in source_file_list['collections']], scorer=fuzz.ratio))
-            matches.append(process.extract(plex_normalize_title, [re.sub(rf"^{prefix}\s(?=\S)", '', item['normalized_title']) for item in source_file_list['collections']], scorer=fuzz.ratio))
-        for suffix in suffixes:
-            matches.append(process.extract(plex_collection, [re.sub(rf"\s*{suffix}*", '', item['title']) for item in source_file_list['collections']], scorer=fuzz.ratio))
-            matches.append(process.extract(plex_normalize_title, [re.sub(rf"\s*{suffix}*", '', item['normalized_title']) for item in source_file_list['collections']], scorer=fuzz.ratio))
-        best_match = find_best_match(matches, plex_collection)
+        best_match = find_best_match(index, plex_collection, plex_normalize_title)
         folder = illegal_chars_regex.sub('', plex_collection)
-        if best_match:
-            match_title = best_match[0]
-            score = best_match[1]
-            for item in source_file_list['collections']:
-                file_title = item['title']
-                files = item['files']
-                file_normalized_title = item['normalized_title']
-                without_prefix = []
-                for prefix in prefixes:
-                    without_prefix = []
-                    for prefix in prefixes:
-                        without_prefix.append(re.sub(rf"^{prefix}\s(?=\S)", '', item['title']))
-                        without_prefix.append(re.sub(rf"^{prefix}\s(?=\S)", '', item['normalized_title']))
-                without_suffix = []
-                for suffix in suffixes:
-                    without_suffix.append(re.sub(rf"\s*{suffix}", '', item['title']))
-                    without_suffix.append(re.sub(rf"\s*{suffix}", '', item['normalized_title']))
-                if score >= collection_threshold and (
-                        match_title == item['title'] or
-                        match_title == item['normalized_title'] or
-                        match_title in without_prefix or
-                        match_title in without_suffix
-                ):
-                    matched_collections['matched_media'].append({
-                        "title": file_title,
-                        "normalized_title": file_normalized_title,
-                        "plex_collection": plex_collection,
-                        "normalized_collection": plex_normalize_title,
-                        "year": None,
-                        "files": files,
-                        "score": score,
-                        "best_match": best_match,
-                        "folder": folder,
-                    })
-                    break
-                elif score >= collection_threshold - 10 and score < collection_threshold and (
-                        match_title == item['title'] or
-                        match_title == item['normalized_title'] or
-                        match_title in without_prefix or
-                        match_title in without_suffix
-                ):
-                    almost_matched['almost_matched'].append({
-                        "title": file_title,
-                        "normalized_title": file_normalized_title,
-                        "plex_collection": plex_collection,
-                        "normalized_collection": plex_normalize_title,
-                        "year": None,
-                        "files": files,
-                        "score": score,
-                        "best_match": best_match,
-                        "folder": folder,
-                    })
-                    break
-                elif score < collection_threshold - 10 and (
-                        match_title == item['title'] or
-                        match_title == item['normalized_title'] or
-                        match_title in without_prefix or
-                        match_title in without_suffix
-                ):
-                    not_matched['not_matched'].append({
-                        "title": file_title,
-                        "normalized_title": file_normalized_title,
-                        "plex_collection": plex_collection,
-                        "normalized_collection": plex_normalize_title,
-                        "year": None,
-                        "files": files,
-                        "score": score,
-                        "best_match": best_match,
-                        "folder": folder,
-                    })
-                    break
+        if not best_match:
+            continue
+        match_title = best_match[0]
+        score = best_match[1]
+        position = index['titles'].get(match_title)
+        if position is None:
+            continue
+        item = source_file_list['collections'][position]
+        match = {
+            "title": item['title'],
+            "normalized_title": item['normalized_title'],
+            "plex_collection": plex_collection,
+            "normalized_collection": plex_normalize_title,
+            "year": None,
+            "files": item['files'],
+            "score": score,
+            "best_match": best_match,
+            "folder": folder,
+        }
+        if score >= collection_threshold:
+            matched_collections['matched_media'].append(match)
+        elif score >= collection_threshold - 10:
+            almost_matched['almost_matched'].append(match)
+        else:
+            not_matched['not_matched'].append(match)
 
     logger.debug(f"Not matched collections: {json.dumps(not_matched, ensure_ascii=False, indent=4)}")
     logger.debug(f"Matched collections: {json.dumps(matched_collections, ensure_ascii=False, indent=4)}")
     logger.debug(f"Almost matched collections: {json.dumps(almost_matched, ensure_ascii=False, indent=4)}")
     return matched_collections
 
+def index_assets(assets):
+    """
+    Index assets by title and normalized title so media can be matched with lookups instead of
+    comparing every item against every asset.
+    Parameters:
+        assets (list): The assets of one type, as built by get_assets_files.
+    Returns:
+        tuple: (title -> positions in assets, normalized title -> positions in assets)
+    """
+    assets_by_title = {}
+    assets_by_normalized_title = {}
+    for position, asset in enumerate(assets):
+        assets_by_title.setdefault(asset['title'], []).append(position)
+        assets_by_normalized_title.setdefault(asset['normalized_title'], []).append(position)
+    return assets_by_title, assets_by_normalized_title
+
 def match_media(media, source_file_list, type):
     matched_media = {"matched_media": []}
     not_matched = {"not_matched": []}
-    for item in tqdm(media, desc="Matching media", total=len(media), disable=None):
+    assets = source_file_list[type]
+    assets_by_title, assets_by_normalized_title = index_assets(assets)
+    # The media are MediaRecords, their fields are read as attributes in this loop
+    for item in tqdm(media, desc="Matching media", total=len(media) if isinstance(media, list) else None, disable=None):
         alternate_title = False
         alternate_titles = []
         normalized_alternate_titles = []
-        arr_title = item['title']
-        try:
-            original_title = item['originalTitle']
-        except KeyError:
-            original_title = None
-        arr_path = os.path.basename(item['path'])
+        arr_title = item.title
+        original_title = getattr(item, 'originalTitle', None)
+        arr_path = os.path.basename(item.path)
         arr_path = year_regex.sub("", arr_path).strip()
         normalized_arr_path = normalize_titles(arr_path)
         try:
-            arr_path_year = year_regex.search(item['path'])
+            arr_path_year = year_regex.search(item.path)
             arr_path_year = int(arr_path_year.group(0)[1:-1])
         except AttributeError:
-            if item['status'] == 'upcoming' or item['status'] == 'announced':
+            if item.status == 'upcoming' or item.status == 'announced':
                 continue
             else:
-                logger.warning(f"Unable to find year in {item['title']} path")
-        try:
-            if item['alternateTitles']:
-                for i in item['alternateTitles']:
-                    alternate_titles.append(i['title'])
-                    normalized_alternate_titles.append(normalize_titles(i['title']))
-        except KeyError:
-            alternate_titles = []
-        year_from_title = year_regex.search(item['title'])
+                logger.warning(f"Unable to find year in {arr_title} path")
+        for i in getattr(item, 'alternateTitles', None) or []:
+            alternate_titles.append(i['title'])
+            normalized_alternate_titles.append(normalize_titles(i['title']))
+        year_from_title = year_regex.search(arr_title)
         arr_normalized_title = normalize_titles(arr_title)
         secondary_year = None
         if year_from_title:
             try:
                 arr_year = int(year_from_title.group(0)[1:-1])
             except ValueError:
-                logger.error(f"Could not convert year to int: {year_from_title.group(0)[1:-1]} for {item['title']}")
+                logger.error(f"Could not convert year to int: {year_from_title.group(0)[1:-1]} for {arr_title}")
                 continue
         else:
-            arr_year = item['year']
-        try:
-            if item['secondaryYear']:
-                secondary_year = item['secondaryYear']
-        except KeyError:
-            secondary_year = None
-        path = item['path']
+            arr_year = item.year
+        secondary_year = getattr(item, 'secondaryYear', None) or None
+        path = item.path
         folder = os.path.basename(os.path.normpath(path))
         files = []
-        for i in source_file_list[type]:
+        # Only the assets sharing a title with the item can match, walk them in their original order
+        candidates = set()
+        for title in [arr_title, arr_path, original_title] + alternate_titles:
+            candidates.update(assets_by_title.get(title, ()))
+        for normalized_title in [arr_normalized_title, normalized_arr_path] + normalized_alternate_titles:
+            candidates.update(assets_by_normalized_title.get(normalized_title, ()))
+        for position in sorted(candidates):
+            i = assets[position]
             file_title = i['title']
             file_normalized_title = i['normalized_title']
             files = i['files']
             file_year = i['year']
             if (
-                    arr_title == file_title or
-                    arr_normalized_title == file_normalized_title or
-                    arr_path == file_title or
-                    normalized_arr_path == file_normalized_title or
-                    original_title == file_title or
-                    file_title in alternate_titles or
-                    file_normalized_title in normalized_alternate_titles
-            ) and (
                     arr_year == file_year or
                     secondary_year == file_year or
                     arr_path_year == file_year
@@ -259,19 +306,7 @@ def match_media(media, source_file_list, type):
                     "folder": folder,
                 })
                 break
-            elif (
-                    arr_title == file_title or
-                    arr_normalized_title == file_normalized_title or
-                    arr_path == file_title or
-                    normalized_arr_path == file_normalized_title or
-                    original_title == file_title or
-                    file_title in alternate_titles or
-                    file_normalized_title in normalized_alternate_titles
-            ) and (
-                    arr_year != file_year or
-                    secondary_year != file_year or
-                    arr_path_year != file_year
-            ):
+            else:
                 not_matched['not_matched'].append({
                     "title": file_title,
                     "normalized_title": file_normalized_title,
@@ -468,29 +503,27 @@ def load_dict(title, year, files):
         "files": files
     }
 
-def normalize_titles(title):
-    normalized_title = title
-    for word in words_to_remove:
-        normalized_title = title.replace(word, '')
-    normalized_title = year_regex.sub('', normalized_title)
-    normalized_title = illegal_chars_regex.sub('', normalized_title)
-    normalized_title = unidecode(html.unescape(normalized_title))
-    normalized_title = normalized_title.rstrip()
-    normalized_title = normalized_title.replace('&', 'and')
-    normalized_title = re.sub(remove_special_chars, '', normalized_title).lower()
-    normalized_title = normalized_title.replace(' ', '')
-    return normalized_title
-
 def add_file_to_asset(category_dict, file):
     category_dict['files'].append(file)
 
-def find_or_create_show(show_list, title, year, files, path):
-    for show in show_list:
-        if title == show['title'] and year == show['year']:
-            add_file_to_asset(show, files[0])
-            return
+def find_or_create_show(show_list, shows, title, year, files, path):
+    """
+    Add a poster to the show it belongs to, creating the show if it's not there yet.
+    Parameters:
+        show_list (list): The series assets.
+        shows (dict): (title, year) -> the show in show_list, kept up to date with it.
+        title (str): The title of the show.
+        year (int): The year of the show.
+        files (list): The poster to add.
+        path (str): The directory the poster is in.
+    """
+    show = shows.get((title, year))
+    if show:
+        add_file_to_asset(show, files[0])
+        return
     show = load_dict(title, year, files)
     show_list.append(show)
+    shows[(title, year)] = show
 
 def get_files(path):
     files = []
@@ -500,27 +533,55 @@ def get_files(path):
         logger.error(f"Path not found: {path}")
     return files
 
+def season_prefixes(files):
+    """
+    Find the names that have season posters, in one pass over the directory.
+    A poster belongs to a series if some file starts with its name and also contains its name followed by
+    one of season_name_info, normally the part of a season poster's name before ' - Season'.
+    Parameters:
+        files (list): The file names in the directory.
+    Returns:
+        set: The names with season posters.
+    """
+    prefixes = set()
+    for file in files:
+        for season_name in season_name_info:
+            end = file.find(season_name)
+            while end != -1:
+                # Every text right before the season marker that the file also starts with
+                start = 0
+                while 0 <= start < end:
+                    if file.startswith(file[start:end]):
+                        prefixes.add(file[start:end])
+                    start = file.find(file[0], start + 1, end)
+                end = file.find(season_name, end + 1)
+    return prefixes
+
 def sort_files(files, path, dict, basename):
+    series_names = season_prefixes(files)
+    shows = {}
+    for show in dict['series']:
+        shows.setdefault((show['title'], show['year']), show)
     for file in tqdm(files, desc=f'Sorting assets from \'{basename}\' directory', total=len(files), disable=None):
         full_path = os.path.join(path, file)
         if file.startswith('.'):
             continue
         base_name, extension = os.path.splitext(file)
-        if not re.search(r'\(\d{4}\)', base_name):
+        match = asset_year_regex.search(base_name)
+        if not match:
             collection = load_dict(base_name, None, [full_path])
             dict['collections'].append(collection)
         else:
-            file_name = os.path.splitext(file)[0]
-            match = re.search(r'\((\d{4})\)', base_name)
-            year = int(match.group(1)) if match else None
+            file_name = base_name
+            year = int(match.group(1))
             title = base_name.replace(f'({year})', '').strip()
-            if any(file.startswith(file_name) and any(file_name + season_name in file for season_name in season_name_info) for file in files):
-                find_or_create_show(dict['series'], title, year, [full_path], path)
+            if file_name in series_names:
+                find_or_create_show(dict['series'], shows, title, year, [full_path], path)
             elif any(word in file for word in season_name_info):
                 for season_name in season_name_info:
                     if season_name in file:
                         title = title.split(season_name)[0].strip()
-                find_or_create_show(dict['series'], title, year, [full_path], path)
+                find_or_create_show(dict['series'], shows, title, year, [full_path], path)
             else:
                 movie = load_dict(title, year, [full_path])
                 dict['movies'].append(movie)
@@ -550,21 +611,40 @@ def get_assets_files(assets_path, override_paths):
     logger.debug(json.dumps(asset_files, indent=4))
     return asset_files
 
+def merge_override_files(files, override_files):
+    """
+    Replace the posters in files that have the same file name as an override poster, and add the override posters.
+    Gives the same list as removing and appending each override poster in turn: the files without an
+    override keep their order, followed by the override posters, only the last one for each file name.
+    Parameters:
+        files (list): The asset's posters.
+        override_files (list): The override asset's posters.
+    Returns:
+        list: The merged posters.
+    """
+    last_position = {}
+    for position, override_file in enumerate(override_files):
+        last_position[os.path.split(override_file)[1]] = position
+    merged = [f for f in files if os.path.split(f)[1] not in last_position]
+    merged.extend(override_file for position, override_file in enumerate(override_files) if last_position[os.path.split(override_file)[1]] == position)
+    return merged
+
 def handle_override_files(asset_files, override_files, path, asset_types):
     for type in asset_types:
+        # (title, year) -> the first asset with it, as a scan of the list would find
+        assets = {}
+        for asset in asset_files[type]:
+            assets.setdefault((asset['title'], asset['year']), asset)
         for override_asset in override_files[type]:
-            asset_found = False
-            for asset in asset_files[type]:
-                if override_asset['title'] == asset['title'] and override_asset['year'] == asset['year']:
-                    asset_found = True
+            asset = assets.get((override_asset['title'], override_asset['year']))
+            if asset:
+                if override_asset['files']:
                     for override_file in override_asset['files']:
-                        over_ride_file_name = os.path.split(override_file)[1]
-                        asset['files'] = [f for f in asset['files'] if os.path.split(f)[1] != over_ride_file_name]
-                        asset['files'].append(override_file)
                         logger.debug(f"Override: Added {override_file} to {asset['title']}")
-                    break
-            if not asset_found:
+                    asset['files'] = merge_override_files(asset['files'], override_asset['files'])
+            else:
                 asset_files[type].append(override_asset)
+                assets[(override_asset['title'], override_asset['year'])] = override_asset
                 logger.debug(f"Override: Added {override_asset['title']} to {type} from {path}")
     return asset_files
 
@@ -596,8 +676,8 @@ def process_instance(instance_type, instance_name, url, api, final_output, asset
         ]
         create_table(data, log_level="info", logger=logger)
     else:
-        app = StARR(url, api, logger)
-        media = app.get_media()
+        app = StARR(url, api, logger, cache=cache, instance_type=instance_type, metrics=metrics, fixtures=fixtures, snapshot=snapshot, rate_limiter=get_rate_limiter(config, url), deadline=deadline)
+        media = app.iter_media(fields=media_fields)
         server_name = app.get_instance_name()
         data = [
             [server_name],
@@ -698,10 +778,17 @@ def main():
             elif instance_type == "Plex":
                 script_name = instance_name
             if script_name and instance_name == script_name:
-                final_output, file_list = process_instance(instance_type, instance_name, url, api, final_output, asset_files)
+                try:
+                    final_output, file_list = process_instance(instance_type, instance_name, url, api, final_output, asset_files)
+                except StARRError as e:
+                    logger.error(f"Skipping {instance_name}: {e}")
+                    continue
                 discord_output[instance_name] = file_list
                 print_output(final_output)
     notification(discord_output)
+    if cache:
+        cache.log_stats()
 
 if __name__ == "__main__":
     main()
+    export_metrics(metrics, config, script_name, logger)
@@ -0,0 +1,21 @@
+import logging
+from modules.arrpy import StARR
+from modules.cache import ResponseCache
+from modules.mock_arr import SyntheticLibrary, MockArrServer
+
+logger = logging.getLogger("test_cache")
+
+def test_writer_invalidates_shared_disk_cache(tmp_path):
+    server = MockArrServer(SyntheticLibrary("Radarr", movies=50, tags=5, seed=1), api_key="key")
+    server.start()
+    try:
+        # Each StARR gets its own ResponseCache on the same directory, like two scripts run one after the other
+        reader = StARR(server.url, "key", logger, cache=ResponseCache(cache_dir=str(tmp_path)), instance_type="Radarr")
+        movie = next(item for item in reader.get_media() if 5 not in item["tags"])
+        writer = StARR(server.url, "key", logger, cache=ResponseCache(cache_dir=str(tmp_path)), instance_type="Radarr")
+        writer.add_tags(movie["id"], 5)
+        next_reader = StARR(server.url, "key", logger, cache=ResponseCache(cache_dir=str(tmp_path)), instance_type="Radarr")
+        media = {item["id"]: item for item in next_reader.get_media()}
+        assert 5 in media[movie["id"]]["tags"]
+    finally:
+        server.stop()
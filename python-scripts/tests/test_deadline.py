@@ -0,0 +1,38 @@
+import time
+import logging
+from contextlib import contextmanager
+import pytest
+from modules.arrpy import StARR, DeadlineExceeded
+from modules.deadline import Deadline
+from modules.mock_arr import SyntheticLibrary, MockArrServer
+
+logger = logging.getLogger("test_deadline")
+
+class SlowRateLimiter:
+    """
+    Holds every request back for a while, like a rate limiter out of tokens.
+    """
+    def __init__(self, wait):
+        self.wait = wait
+
+    @contextmanager
+    def limit(self, method):
+        time.sleep(self.wait)
+        yield
+
+@pytest.fixture
+def server():
+    server = MockArrServer(SyntheticLibrary("Radarr", movies=5, seed=1), api_key="key")
+    server.start()
+    yield server
+    server.stop()
+
+def test_expired_deadline_raises_deadline_exceeded(server):
+    app = StARR(server.url, "key", logger, instance_type="Radarr", deadline=Deadline(0))
+    with pytest.raises(DeadlineExceeded):
+        app.get_media()
+
+def test_deadline_passing_in_rate_limiter_raises_deadline_exceeded(server):
+    app = StARR(server.url, "key", logger, instance_type="Radarr", deadline=Deadline(0.05), rate_limiter=SlowRateLimiter(0.1))
+    with pytest.raises(DeadlineExceeded):
+        app.get_media()
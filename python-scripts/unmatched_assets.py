@@ -30,7 +30,7 @@ from plexapi.server import PlexServer
 from plexapi.exceptions import BadRequest
 from modules.logger import setup_logger
 from modules.config import Config
-from unidecode import unidecode
+from modules.normalize import load_normalize, transliterate, compact_title
 from tqdm import tqdm
 import json
 import logging
@@ -42,6 +42,7 @@ script_name = "unmatched_assets"
 config = Config(script_name)
 log_level = config.log_level
 logger = setup_logger(log_level, script_name)
+load_normalize(config, logger)
 version(script_name, script_version, arrpy_py_version=None, logger=logger, config=config)
 
 logging.getLogger("requests").setLevel(logging.WARNING)
@@ -102,7 +103,7 @@ def get_assets_files(assets_path):
             else:
                 file_name = os.path.splitext(file)[0]
                 title = base_name
-                title = unidecode(title)
+                title = transliterate(title)
                 title_without_season_info = title
                 for season_info in season_name_info:
                     title_without_season_info = re.sub(
@@ -200,9 +201,9 @@ def match_assets(assets, media, plex_collections):
     unmatched_media = {'unmatched_movies': [], 'unmatched_series': [], 'unmatched_collections': []}
     for series in tqdm(media['series'], desc='Matching series', total=len(media['series'])):
         asset_found = False
-        media_title  = re.sub(r'[^A-Za-z0-9]+', '', unidecode(series['title']).replace('&', 'and')).strip().lower()
+        media_title  = compact_title(series['title'])
         for asset in assets['series']:
-            asset_title = re.sub(r'[^A-Za-z0-9]+', '', unidecode(asset['title']).replace('&', 'and')).strip().lower()
+            asset_title = compact_title(asset['title'])
             if asset_title == media_title:
                 asset_found = True
                 missing_seasons = [
@@ -224,9 +225,9 @@ def match_assets(assets, media, plex_collections):
             })
     for media_movie in tqdm(media['movies'], desc='Matching movies', total=len(media['movies'])):
         asset_found = False
-        media_title = re.sub(r'[^A-Za-z0-9]+', '', unidecode(media_movie['title']).replace('&', 'and')).strip().lower()
+        media_title = compact_title(media_movie['title'])
         for asset in assets['movies']:
-            asset_title = re.sub(r'[^A-Za-z0-9]+', '', unidecode(asset['title']).replace('&', 'and')).strip().lower()
+            asset_title = compact_title(asset['title'])
             if media_title == asset_title:
                 asset_found = True
                 break
@@ -238,7 +239,7 @@ def match_assets(assets, media, plex_collections):
     for plex_collection in tqdm(plex_collections['collections'], desc='Matching collections', total=len(plex_collections['collections'])):
         asset_found = False
         for asset in assets['collections']:
-            if unidecode(plex_collection['title']) == unidecode(asset['title']):
+            if transliterate(plex_collection['title']) == transliterate(asset['title']):
                 asset_found = True
                 break
         if not asset_found:
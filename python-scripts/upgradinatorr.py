@@ -18,7 +18,13 @@ script_version = "3.2.2"
 
 from modules.config import Config
 from modules.logger import setup_logger
-from modules.arrpy import StARR
+from modules.arrpy import default_media_fields
+from modules.metrics import load_metrics, export_metrics
+from modules.fixtures import load_fixtures
+from modules.fleet import Fleet
+from modules.deadline import load_deadline
+from modules.snapshot import load_snapshot
+from modules.cache import load_cache
 from modules.arrpy import arrpy_py_version
 from modules.version import version
 from modules.discord import discord
@@ -28,6 +34,11 @@ script_name = "upgradinatorr"
 config = Config(script_name)
 log_level = config.log_level
 logger = setup_logger(log_level, script_name)
+metrics = load_metrics(config)
+deadline = load_deadline(config)
+fixtures = load_fixtures(config, script_name, logger)
+snapshot = load_snapshot(config, logger)
+cache = load_cache(config, logger)
 version(script_name, script_version, arrpy_py_version, logger, config)
 
 def check_all_tagged(all_media, tag_id, status, monitored):
@@ -57,10 +68,11 @@ def check_all_tagged(all_media, tag_id, status, monitored):
             return False
     return True
 
-def process_instance(instance_type, instance_name, count, tag_name, unattended, status, monitored, url, api, dry_run, reset):
+def process_instance(app, instance_type, instance_name, count, tag_name, unattended, status, monitored, url, api, dry_run, reset):
     """
     Process a given instance.
     Parameters:
+        app (StARR): The StARR object for the instance.
         instance_type (str): The type of instance to process.
         instance_name (str): The name of the instance to process.
         count (int): The number of items to process.
@@ -77,7 +89,7 @@ def process_instance(instance_type, instance_name, count, tag_name, unattended,
     tagged_count = 0
     untagged_count = 0
     total_count = 0
-    app = StARR(url, api, logger)
+    logger = app.logger
     server_name = app.get_instance_name()
     data = [
         [server_name],
@@ -98,7 +110,7 @@ def process_instance(instance_type, instance_name, count, tag_name, unattended,
     logger.debug(f'{"Instance Type:":<20}{instance_type if instance_type else "Not Set"}')
     logger.debug(f'{"ARR name:":<20}{server_name if instance_name else "Not Set"}')
     logger.debug('*' * 40 + '\n')
-    media = app.get_media()
+    media = app.get_media(fields=default_media_fields)
     if instance_type == "Radarr":
         media_type = "Movies"
     elif instance_type == "Sonarr":
@@ -175,43 +187,25 @@ def main():
             ["NO CHANGES WILL BE MADE"]
         ]
         create_table(data, log_level="info", logger=logger)
-    instance_data = {
-        'Radarr': config.radarr_data,
-        'Sonarr': config.sonarr_data
-    }
+    fleet = Fleet(config, logger, cache=cache, metrics=metrics, fixtures=fixtures, snapshot=snapshot, deadline=deadline)
 
-    for instance_type, instances in instance_data.items():
-        for instance in instances:
-            instance_name = instance['name']
-            url = instance['url']
-            api = instance['api']
-            script_name = None
-            if instance_type == "Radarr" and config.radarr:
-                data = next((data for data in config.radarr if data['name'] == instance_name), None)
-                if data:
-                    script_name = data['name']
-                    count = data.get('count', 1)
-                    tag_name = data.get('tag_name', 'Upgradinatorr')
-                    reset = data.get('reset', False)
-                    unattended = data.get('unattended', False)
-                    monitored = data.get('monitored', True)
-                    status = data.get('status', 'all')
-            elif instance_type == "Sonarr" and config.sonarr:
-                data = next((data for data in config.sonarr if data['name'] == instance_name), None)
-                if data:
-                    script_name = data['name']
-                    count = data['count']
-                    count = data.get('count', 1)
-                    tag_name = data.get('tag_name', 'Upgradinatorr')
-                    reset = data.get('reset', False)
-                    unattended = data.get('unattended', False)
-                    monitored = data.get('monitored', True)
-                    status = data.get('status', 'all')
-            if script_name and instance_name == script_name:
-                process_instance(instance_type, instance_name, count, tag_name, unattended, status, monitored, url, api, config.dry_run, reset)
+    def run_instance(app, instance):
+        data = instance['settings']
+        count = data.get('count', 1)
+        tag_name = data.get('tag_name', 'Upgradinatorr')
+        reset = data.get('reset', False)
+        unattended = data.get('unattended', False)
+        monitored = data.get('monitored', True)
+        status = data.get('status', 'all')
+        process_instance(app, instance['instance_type'], instance['name'], count, tag_name, unattended, status, monitored, instance['url'], instance['api'], config.dry_run, reset)
+
+    fleet.run(run_instance)
+    if cache:
+        cache.log_stats()
 
 if __name__ == '__main__':
     """
     Main entry point for the script.
     """
     main()
+    export_metrics(metrics, config, script_name, logger)